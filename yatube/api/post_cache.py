@@ -0,0 +1,46 @@
+from django.db.models import Count
+
+from core import object_cache
+from posts.models import Comment, Group, Post, User
+
+from .serializers import PostSerializer
+
+
+def _comment_counts(post_ids) -> dict:
+    return dict(
+        Comment.objects.visible().filter(post_id__in=post_ids)
+        .values_list('post_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def get_post_payloads(post_ids) -> dict:
+    """Возвращает словарь {id: данные поста} для видимых постов.
+
+    Посты, авторы и группы читаются из object_cache одним get_many на
+    модель, и их копии сбрасываются сигналами этого кэша. Из БД всегда
+    берётся только число комментариев: один запрос на весь пакет.
+    Адрес миниатюры заранее сохранён фоновой обработкой картинки.
+    """
+    posts = [
+        post for post in object_cache.get_many(Post, post_ids).values()
+        if not post.is_hidden
+    ]
+    if not posts:
+        return {}
+    authors = object_cache.get_many(User, {post.author_id for post in posts})
+    groups = object_cache.get_many(
+        Group, {post.group_id for post in posts if post.group_id}
+    )
+    comment_counts = _comment_counts([post.pk for post in posts])
+    serializer = PostSerializer()
+    payloads = {}
+    for post in posts:
+        if post.author_id not in authors:
+            continue
+        post.author = authors[post.author_id]
+        post.group = groups.get(post.group_id)
+        post.comments_count = comment_counts.get(post.pk, 0)
+        payloads[post.pk] = serializer.to_dict(post)
+    return payloads
@@ -0,0 +1,107 @@
+from django.db.models import Count, Q
+
+
+def _image_url(post):
+    return post.image.url if post.image else None
+
+
+def _group_posts_count(group):
+    # Счётчик GroupStats учитывает и архивные посты.
+    stats = getattr(group, 'stats', None)
+    return stats.post_count if stats else 0
+
+
+class ModelSerializer:
+    """Превращает объекты модели в словари с набором полей из ?fields=.
+
+    `related` и `annotations` описывают, какие select_related и annotate
+    нужны для поля; queryset готовится только под запрошенные поля,
+    поэтому сериализация списка никогда не делает запросов на строку.
+    """
+
+    fields: dict = {}
+    related: dict = {}
+    annotations: dict = {}
+
+    def __init__(self, fields=None):
+        self.field_names = [
+            name for name in self.fields if not fields or name in fields
+        ] or list(self.fields)
+
+    def prepare(self, queryset):
+        related = {
+            self.related[name]
+            for name in self.field_names if name in self.related
+        }
+        annotations = {
+            name: self.annotations[name]
+            for name in self.field_names if name in self.annotations
+        }
+        if related:
+            queryset = queryset.select_related(*related)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+    def to_dict(self, obj) -> dict:
+        return {name: self.fields[name](obj) for name in self.field_names}
+
+
+class PostSerializer(ModelSerializer):
+    fields = {
+        'id': lambda post: post.pk,
+        'text': lambda post: post.text,
+        'pub_date': lambda post: post.pub_date,
+        'author': lambda post: post.author.username,
+        'group': lambda post: post.group.slug if post.group else None,
+        'image': _image_url,
+        'thumbnail': lambda post: post.image_thumbnail or None,
+        'comments_count': lambda post: post.comments_count,
+    }
+    related = {
+        'author': 'author',
+        'group': 'group',
+    }
+    annotations = {
+        'comments_count': Count(
+            'comments', filter=Q(comments__is_hidden=False)
+        ),
+    }
+
+
+class GroupSerializer(ModelSerializer):
+    fields = {
+        'id': lambda group: group.pk,
+        'title': lambda group: group.title,
+        'slug': lambda group: group.slug,
+        'description': lambda group: group.description,
+        'posts_count': _group_posts_count,
+    }
+    related = {
+        'posts_count': 'stats',
+    }
+
+
+class CommentSerializer(ModelSerializer):
+    fields = {
+        'id': lambda comment: comment.pk,
+        'post': lambda comment: comment.post_id,
+        'author': lambda comment: comment.author.username,
+        'text': lambda comment: comment.text,
+        'created': lambda comment: comment.created,
+    }
+    related = {
+        'author': 'author',
+    }
+
+
+class FollowSerializer(ModelSerializer):
+    fields = {
+        'id': lambda follow: follow.pk,
+        'user': lambda follow: follow.user.username,
+        'author': lambda follow: follow.author.username,
+    }
+    related = {
+        'user': 'user',
+        'author': 'author',
+    }
@@ -0,0 +1,211 @@
+import gzip
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import object_cache
+from posts.models import Comment, Follow, Post
+from posts.tests.fixtures import load_group_posts
+from posts.utils.paginator import encode_cursor
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        fixture = load_group_posts(username='author', count=25)
+        cls.author, cls.group = fixture.author, fixture.group
+        Comment.objects.create(
+            post=fixture.posts[-1], author=cls.user, text='Коммент'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ApiTests.user)
+
+    def test_post_list_paginates_without_per_row_queries(self):
+        """Список постов листается курсором за фиксированное число запросов."""
+        url = reverse('api:post_list')
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url)
+        data = response.json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertEqual(data['results'][0]['author'], 'author')
+        self.assertEqual(data['results'][0]['group'], 'testslug')
+        self.assertEqual(data['results'][0]['comments_count'], 1)
+        response = self.guest_client.get(data['next'])
+        data = response.json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next'])
+
+    def test_tampered_cursor_returns_first_page(self):
+        """Курсор с неверными типами значений даёт первую страницу."""
+        url = reverse('api:post_list')
+        first = self.guest_client.get(url).json()
+        for values in (['notadate', 'x'], [None, 1], [[1], {}]):
+            cursor = encode_cursor(values)
+            response = self.guest_client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertEqual(response.json()['results'], first['results'])
+
+    def test_group_posts_count_comes_from_stats(self):
+        """posts_count группы читается из GroupStats одним запросом."""
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('api:group_list'))
+        self.assertEqual(response.json()['results'][0]['posts_count'], 25)
+
+    def test_sparse_fieldsets(self):
+        """Параметр fields ограничивает набор полей ответа."""
+        response = self.guest_client.get(
+            reverse('api:post_list'), {'fields': 'id,text', 'limit': 1}
+        )
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'text'}
+        )
+
+    def test_responses_are_compressed(self):
+        """Ответы сжимаются, если клиент поддерживает gzip."""
+        response = self.guest_client.get(
+            reverse('api:post_list'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('results', json.loads(gzip.decompress(response.content)))
+
+    def test_guest_cannot_write(self):
+        """Аноним получает 401 при попытке записи."""
+        response = self.guest_client.post(
+            reverse('api:post_list'),
+            json.dumps({'text': 'Пост'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_create_post_comment_and_follow(self):
+        """Авторизованный пользователь создаёт пост, комментарий и подписку."""
+        response = self.authorized_client.post(
+            reverse('api:post_list'),
+            json.dumps({'text': 'Новый пост', 'group': 'testslug'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        post_id = response.json()['id']
+        self.assertEqual(Post.objects.get(pk=post_id).group, ApiTests.group)
+        response = self.authorized_client.post(
+            reverse('api:comment_list', kwargs={'post_id': post_id}),
+            json.dumps({'text': 'Комментарий'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        response = self.authorized_client.post(
+            reverse('api:follow_list'),
+            json.dumps({'username': 'author'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTrue(
+            Follow.objects.filter(
+                user=ApiTests.user, author=ApiTests.author
+            ).exists()
+        )
+
+    def test_unknown_group_is_rejected(self):
+        """Пост с несуществующей группой не создаётся."""
+        response = self.authorized_client.post(
+            reverse('api:post_list'),
+            json.dumps({'text': 'Новый пост', 'group': 'nope'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('group', response.json()['errors'])
+        self.assertFalse(Post.objects.filter(text='Новый пост').exists())
+
+    def test_only_author_can_edit_post(self):
+        """Редактировать пост через API может только автор."""
+        post = Post.objects.first()
+        response = self.authorized_client.patch(
+            reverse('api:post_detail', kwargs={'post_id': post.pk}),
+            json.dumps({'text': 'Изменено'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_patch_requires_json(self):
+        """PATCH с телом формы отклоняется, а не игнорируется."""
+        post = Post.objects.create(author=ApiTests.user, text='Исходный')
+        url = reverse('api:post_detail', kwargs={'post_id': post.pk})
+        response = self.authorized_client.patch(
+            url, 'text=Изменено',
+            content_type='application/x-www-form-urlencoded',
+        )
+        self.assertEqual(
+            response.status_code, HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+        )
+        response = self.authorized_client.patch(
+            url, json.dumps({'text': 'Изменено'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['text'], 'Изменено')
+
+    def test_post_batch_uses_cache_multiget(self):
+        """Пакетная выдача постов повторно читает из БД только счётчики."""
+        cache.clear()
+        post_ids = list(Post.objects.values_list('pk', flat=True)[:10])
+        url = reverse('api:post_batch')
+        ids = ','.join(map(str, post_ids + [0]))
+        # Посты, авторы, группы и один запрос за числом комментариев.
+        with self.assertNumQueries(4):
+            response = self.guest_client.get(url, {'ids': ids})
+        data = response.json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], post_ids
+        )
+        self.assertEqual(data['missing'], [0])
+        with self.assertNumQueries(1):
+            self.guest_client.get(url, {'ids': ids})
+
+    def test_post_batch_returns_stored_thumbnail(self):
+        """Миниатюра берётся из поста, sorl при выдаче не вызывается."""
+        cache.clear()
+        posts = Post.objects.all()[:2]
+        Post.objects.filter(pk=posts[0].pk).update(
+            image='posts/photo.jpg',
+            image_thumbnail='/media/cache/ab/cd/abcd.jpg',
+        )
+        object_cache.bump_version(Post, posts[0].pk)
+        ids = ','.join(str(post.pk) for post in posts)
+        with self.assertNumQueries(4):
+            response = self.guest_client.get(
+                reverse('api:post_batch'), {'ids': ids}
+            )
+        thumbnails = [
+            post['thumbnail'] for post in response.json()['results']
+        ]
+        self.assertEqual(thumbnails, ['/media/cache/ab/cd/abcd.jpg', None])
+
+    def test_post_batch_is_invalidated_on_comment(self):
+        """Новый комментарий сбрасывает кэш данных поста."""
+        cache.clear()
+        post = Post.objects.last()
+        url = reverse('api:post_batch')
+        self.guest_client.get(url, {'ids': post.pk})
+        Comment.objects.create(post=post, author=ApiTests.user, text='Ещё')
+        response = self.guest_client.get(url, {'ids': post.pk})
+        self.assertEqual(
+            response.json()['results'][0]['comments_count'],
+            post.comments.count(),
+        )
+
+    def test_post_batch_size_is_limited(self):
+        """Слишком большой пакет отклоняется."""
+        ids = ','.join(str(i) for i in range(1, 200))
+        response = self.guest_client.get(
+            reverse('api:post_batch'), {'ids': ids}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,293 @@
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from core.ratelimit import ratelimit
+from posts.forms import CommentForm, PostForm
+from posts.models import ArchivedPost, Comment, Follow, Group, Post, User
+from posts.utils import follow_graph
+from posts.utils.paginator import get_cursor_page
+
+from .post_cache import get_post_payloads
+from .serializers import (CommentSerializer, FollowSerializer,
+                          GroupSerializer, PostSerializer)
+
+DEFAULT_LIMIT: int = 20
+MAX_LIMIT: int = 100
+MAX_BATCH_SIZE: int = 100
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+UNKNOWN_GROUP_ERRORS = {'group': ['Группы с таким slug нет.']}
+
+
+def _error(message, status):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def login_required_for_writes(view_func):
+    """Требует авторизации для всех методов, кроме безопасных."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and not request.user.is_authenticated
+        ):
+            return _error('Требуется авторизация.', HTTPStatus.UNAUTHORIZED)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _requested_fields(request):
+    fields = request.GET.get('fields')
+    return fields.split(',') if fields else None
+
+
+def _get_limit(request) -> int:
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return DEFAULT_LIMIT
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _get_data(request):
+    """Возвращает тело запроса как словарь или None, если JSON некорректен."""
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _list_response(request, queryset, serializer_class, ordering):
+    serializer = serializer_class(_requested_fields(request))
+    page = get_cursor_page(
+        request, serializer.prepare(queryset), _get_limit(request), ordering
+    )
+    next_url = None
+    if page.has_next():
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_url = f'{request.path}?{params.urlencode()}'
+    return JsonResponse({
+        'results': [serializer.to_dict(obj) for obj in page],
+        'next': next_url,
+    })
+
+
+def _object_response(request, queryset, serializer_class, status=200,
+                     **lookup):
+    serializer = serializer_class(_requested_fields(request))
+    obj = get_object_or_404(serializer.prepare(queryset), **lookup)
+    return JsonResponse(serializer.to_dict(obj), status=status)
+
+
+def _post_form_data(data, post=None):
+    """Готовит данные для PostForm: группа в API задаётся slug'ом.
+
+    Возвращает None, если группы с указанным slug нет.
+    """
+    form_data = {
+        'text': post.text if post else '',
+        'group': post.group_id if post else None,
+    }
+    form_data.update(
+        (key, value) for key, value in data.items() if key in form_data
+    )
+    if data.get('group'):
+        form_data['group'] = Group.objects.filter(
+            slug=data['group']
+        ).values_list('pk', flat=True).first()
+        if form_data['group'] is None:
+            return None
+    elif 'group' in data:
+        form_data['group'] = None
+    return form_data
+
+
+def _form_errors(errors):
+    return JsonResponse({'errors': errors}, status=HTTPStatus.BAD_REQUEST)
+
+
+@require_http_methods(['GET', 'POST'])
+@login_required_for_writes
+@ratelimit('post_create')
+def post_list(request):
+    if request.method == 'POST':
+        data = _get_data(request)
+        if data is None:
+            return _error('Некорректный JSON.', HTTPStatus.BAD_REQUEST)
+        form_data = _post_form_data(data)
+        if form_data is None:
+            return _form_errors(UNKNOWN_GROUP_ERRORS)
+        form = PostForm(form_data, files=request.FILES or None)
+        if not form.is_valid():
+            return _form_errors(form.errors)
+        post = form.save(commit=False)
+        post.author = request.user
+        post.save()
+        return _object_response(
+            request, Post.objects.all(), PostSerializer,
+            status=HTTPStatus.CREATED, pk=post.pk,
+        )
+    post_list = Post.objects.visible()
+    if 'group' in request.GET:
+        post_list = post_list.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        post_list = post_list.filter(author__username=request.GET['author'])
+    return _list_response(
+        request, post_list, PostSerializer, ordering=('-pub_date', '-pk')
+    )
+
+
+@require_http_methods(['GET'])
+def post_batch(request):
+    try:
+        post_ids = list(dict.fromkeys(
+            int(post_id)
+            for post_id in request.GET.get('ids', '').split(',') if post_id
+        ))
+    except ValueError:
+        return _error('ids должен быть списком чисел.', HTTPStatus.BAD_REQUEST)
+    if len(post_ids) > MAX_BATCH_SIZE:
+        return _error(
+            f'Можно запросить не больше {MAX_BATCH_SIZE} постов.',
+            HTTPStatus.BAD_REQUEST,
+        )
+    payloads = get_post_payloads(post_ids)
+    fields = _requested_fields(request)
+    results = [
+        {
+            name: value for name, value in payloads[post_id].items()
+            if not fields or name in fields
+        }
+        for post_id in post_ids if post_id in payloads
+    ]
+    return JsonResponse({
+        'results': results,
+        'missing': [
+            post_id for post_id in post_ids if post_id not in payloads
+        ],
+    })
+
+
+@require_http_methods(['GET', 'PATCH', 'DELETE'])
+@login_required_for_writes
+def post_detail(request, post_id):
+    if request.method in ('PATCH', 'DELETE'):
+        post = get_object_or_404(Post, pk=post_id)
+        if post.author_id != request.user.pk:
+            return _error(
+                'Изменять пост может только автор.', HTTPStatus.FORBIDDEN
+            )
+        if request.method == 'DELETE':
+            post.delete()
+            return HttpResponse(status=HTTPStatus.NO_CONTENT)
+        # Тело формы Django разбирает только для POST, в PATCH
+        # request.POST всегда пуст.
+        if request.content_type != 'application/json':
+            return _error(
+                'PATCH принимает только application/json.',
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            )
+        data = _get_data(request)
+        if data is None:
+            return _error('Некорректный JSON.', HTTPStatus.BAD_REQUEST)
+        form_data = _post_form_data(data, post)
+        if form_data is None:
+            return _form_errors(UNKNOWN_GROUP_ERRORS)
+        form = PostForm(form_data, instance=post)
+        if not form.is_valid():
+            return _form_errors(form.errors)
+        form.save()
+    try:
+        return _object_response(
+            request, Post.objects.visible(), PostSerializer, pk=post_id
+        )
+    except Http404:
+        # Как и страница поста, API ищет пост в архиве.
+        return _object_response(
+            request, ArchivedPost.objects.visible(), PostSerializer,
+            pk=post_id,
+        )
+
+
+@require_http_methods(['GET'])
+def group_list(request):
+    return _list_response(
+        request, Group.objects.all(), GroupSerializer,
+        ordering=('title', 'pk'),
+    )
+
+
+@require_http_methods(['GET'])
+def group_detail(request, slug):
+    return _object_response(
+        request, Group.objects.all(), GroupSerializer, slug=slug
+    )
+
+
+@require_http_methods(['GET', 'POST'])
+@login_required_for_writes
+@ratelimit('add_comment')
+def comment_list(request, post_id):
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
+    if request.method == 'POST':
+        data = _get_data(request)
+        if data is None:
+            return _error('Некорректный JSON.', HTTPStatus.BAD_REQUEST)
+        form = CommentForm(data)
+        if not form.is_valid():
+            return _form_errors(form.errors)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+        return _object_response(
+            request, Comment.objects.all(), CommentSerializer,
+            status=HTTPStatus.CREATED, pk=comment.pk,
+        )
+    return _list_response(
+        request, post.comments.visible(), CommentSerializer,
+        ordering=('created', 'pk'),
+    )
+
+
+@require_http_methods(['GET', 'POST'])
+@ratelimit('profile_follow')
+def follow_list(request):
+    if not request.user.is_authenticated:
+        return _error('Требуется авторизация.', HTTPStatus.UNAUTHORIZED)
+    if request.method == 'POST':
+        data = _get_data(request)
+        if data is None:
+            return _error('Некорректный JSON.', HTTPStatus.BAD_REQUEST)
+        author = get_object_or_404(User, username=data.get('username'))
+        if author.pk == request.user.pk:
+            return _error(
+                'Нельзя подписаться на себя.', HTTPStatus.BAD_REQUEST
+            )
+        created = follow_graph.follow(request.user, author)
+        return _object_response(
+            request, Follow.objects.all(), FollowSerializer,
+            status=HTTPStatus.CREATED if created else HTTPStatus.OK,
+            user=request.user, author=author,
+        )
+    return _list_response(
+        request, Follow.objects.filter(user=request.user), FollowSerializer,
+        ordering=('pk',),
+    )
+
+
+@require_http_methods(['DELETE'])
+@login_required_for_writes
+def follow_detail(request, username):
+    author = get_object_or_404(User, username=username)
+    if not follow_graph.unfollow(request.user, author):
+        return _error('Подписка не найдена.', HTTPStatus.NOT_FOUND)
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
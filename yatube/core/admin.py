@@ -0,0 +1,125 @@
+"""Админка для больших таблиц.
+
+Страница списка Django по умолчанию выполняет два COUNT(*) по всей
+таблице: для пагинатора и для строки "N всего". На миллионах строк это
+дольше, чем выборка самой страницы. LargeTableAdmin отключает второй
+подсчёт, а EstimatedCountPaginator без фильтров берёт оценку числа
+строк из статистики СУБД.
+
+Кроме того, autocomplete-поля в list_editable не делают отдельный
+запрос за подписью выбранного объекта в каждой строке.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+ESTIMATE_QUERIES = {
+    'postgresql': (
+        'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    ),
+    'mysql': (
+        'SELECT table_rows FROM information_schema.tables '
+        'WHERE table_schema = DATABASE() AND table_name = %s'
+    ),
+    # Заполняется командой ANALYZE; первое число - строк в таблице.
+    'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+}
+
+
+def estimate_count(model, using='default'):
+    """Оценка числа строк в таблице модели или None, если её нет."""
+    connection = connections[using]
+    sql = ESTIMATE_QUERIES.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    try:
+        count = int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+    # PostgreSQL возвращает -1 для ни разу не проанализированной таблицы.
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает строки неотфильтрованной таблицы.
+
+    Если оценка меньше ADMIN_ESTIMATED_COUNT_MIN, число строк считается
+    точно: на маленьких таблицах это дёшево, а оценка бывает неточной.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if (
+                estimate is not None
+                and estimate >= settings.ADMIN_ESTIMATED_COUNT_MIN
+            ):
+                return estimate
+        return super().count
+
+
+class CachedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, запоминающий подписи выбранных объектов.
+
+    Копии виджета в строках одного списка делят общий словарь, поэтому
+    запросов столько, сколько разных значений на странице, а не строк.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = {}
+
+    def optgroups(self, name, value, attr=None):
+        field = self.choices.field
+        selected = [
+            str(item) for item in value
+            if str(item) not in field.empty_values
+        ]
+        missing = [item for item in selected if item not in self.labels]
+        if missing:
+            self.labels.update(
+                (str(obj.pk), field.label_from_instance(obj))
+                for obj in field.queryset.using(self.db).filter(
+                    pk__in=missing
+                )
+            )
+        options = []
+        if not self.is_required and not self.allow_multiple_selected:
+            options.append(self.create_option(name, '', '', False, 0))
+        for item in selected:
+            if item in self.labels:
+                options.append(self.create_option(
+                    name, item, self.labels[item], True, len(options)
+                ))
+        return [(None, options, 0)]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if (
+            'widget' not in kwargs
+            and db_field.name in self.get_autocomplete_fields(request)
+        ):
+            kwargs['widget'] = CachedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
@@ -0,0 +1,109 @@
+"""Сборка локальных JS/CSS в бандлы.
+
+Состав бандлов задаётся в settings.ASSET_BUNDLES:
+
+    ASSET_BUNDLES = {'site.js': ['js/jquery.js', 'js/bootstrap.js']}
+
+`manage.py build_assets` склеивает и минифицирует исходники в
+`<ASSET_BUNDLE_DIR>/<имя>`, после чего collectstatic добавляет к
+имени хэш содержимого (ManifestStaticFilesStorage) и сжатые копии.
+Тег `{% bundle %}` при ASSET_BUNDLES_ENABLED подключает бандл,
+иначе - исходные файлы по отдельности, как удобно при разработке.
+Если бандл не собран (нет записи в манифесте статики), подключаются
+исходники и в лог пишется предупреждение.
+"""
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_PREFIX = 'bundles/'
+SOURCE_MAP_RE = re.compile(r'^\s*//# sourceMappingURL=.*$', re.MULTILINE)
+# Комментарии /*! ... */ - лицензии, их нужно сохранить.
+CSS_COMMENT_RE = re.compile(r'/\*(?!!).*?\*/', re.DOTALL)
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{};])\s*')
+
+
+def minify_css(css: str) -> str:
+    css = CSS_COMMENT_RE.sub('', css)
+    css = CSS_SPACE_RE.sub(' ', css)
+    return CSS_PUNCTUATION_RE.sub(r'\1', css).strip()
+
+
+def minify_js(js: str) -> str:
+    """Убирает ссылки на source map: к бандлу они не подходят.
+
+    Если установлен rjsmin, код дополнительно минифицируется.
+    """
+    js = SOURCE_MAP_RE.sub('', js)
+    return rjsmin.jsmin(js) if rjsmin is not None else js.strip()
+
+
+def get_bundle(name) -> list:
+    try:
+        return settings.ASSET_BUNDLES[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f'Бандл {name!r} не описан в ASSET_BUNDLES.'
+        )
+
+
+def build_bundle(name) -> str:
+    """Возвращает содержимое бандла, собранное из исходников."""
+    parts = []
+    for source in get_bundle(name):
+        path = finders.find(source)
+        if path is None:
+            raise ImproperlyConfigured(
+                f'Файл {source!r} из бандла {name!r} не найден.'
+            )
+        with open(path, encoding='utf-8') as file:
+            parts.append(file.read())
+    if name.endswith('.css'):
+        return '\n'.join(minify_css(part) for part in parts) + '\n'
+    # ';' защищает от склейки выражений на границе файлов.
+    return ';\n'.join(minify_js(part) for part in parts) + ';\n'
+
+
+def write_bundles() -> dict:
+    """Пишет все бандлы на диск и возвращает {имя: размер в байтах}."""
+    os.makedirs(settings.ASSET_BUNDLE_DIR, exist_ok=True)
+    sizes = {}
+    for name in settings.ASSET_BUNDLES:
+        content = build_bundle(name).encode()
+        with open(os.path.join(settings.ASSET_BUNDLE_DIR, name), 'wb') as f:
+            f.write(content)
+        sizes[name] = len(content)
+    return sizes
+
+
+def _is_built(path) -> bool:
+    try:
+        # Хранилище с манифестом отказывает файлам, которых нет в нём.
+        staticfiles_storage.url(path)
+    except ValueError:
+        logger.warning(
+            'Бандл %s не собран, подключаются исходные файлы. '
+            'Запустите build_assets и collectstatic.', path,
+        )
+        return False
+    return True
+
+
+def bundle_paths(name) -> list:
+    """Пути статики, которые нужно подключить для бандла."""
+    if settings.ASSET_BUNDLES_ENABLED and _is_built(BUNDLE_PREFIX + name):
+        return [BUNDLE_PREFIX + name]
+    return list(get_bundle(name))
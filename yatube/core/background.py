@@ -0,0 +1,48 @@
+"""Простой пул фоновых задач внутри процесса.
+
+Задачи ставятся в очередь после коммита текущей транзакции и
+выполняются в потоках ThreadPoolExecutor; каждый поток закрывает
+своё соединение с БД после задачи. При BACKGROUND_TASKS_EAGER задача
+выполняется сразу в текущем потоке (удобно для тестов и отладки).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='yatube-background',
+            )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs) -> None:
+    """Выполняет func(*args, **kwargs) в фоне после коммита транзакции."""
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            func(*args, **kwargs)
+        else:
+            _get_executor().submit(_run, func, args, kwargs)
+    transaction.on_commit(submit)
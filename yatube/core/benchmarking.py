@@ -0,0 +1,35 @@
+"""Реестр микробенчмарков для `manage.py benchmark`.
+
+Бенчмарки описываются в модулях `<приложение>/benchmarks.py`:
+
+    @benchmark('compression')
+    def compression(number):
+        return [{'вариант': 'gzip', 'байт': 1234, 'мс': 0.8}]
+
+Функция получает число повторов и возвращает строки таблицы.
+"""
+import time
+
+from django.utils.module_loading import autodiscover_modules
+
+_registry: dict = {}
+
+
+def benchmark(name):
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_benchmarks() -> dict:
+    autodiscover_modules('benchmarks')
+    return dict(sorted(_registry.items()))
+
+
+def measure(func, number: int) -> float:
+    """Среднее время одного вызова func в миллисекундах."""
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) * 1000 / number
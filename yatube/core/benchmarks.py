@@ -0,0 +1,160 @@
+import datetime as dt
+import re
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles import finders
+from django.forms.renderers import DjangoTemplates
+from django.template import context_processors as django_processors
+from django.template import engines
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from .assets import BUNDLE_PREFIX, build_bundle
+from .benchmarking import benchmark, measure
+from .forms import DEFAULT_WIDGET_CLASS, CachedTemplatesRenderer
+from .middleware import brotli, compress, minify_html
+
+
+ASSET_URL_RE = re.compile(
+    r'<(?:script[^>]*\ssrc|link rel="stylesheet"[^>]*\shref)="([^"]+)"'
+)
+
+
+def _render_page(url, **overrides) -> bytes:
+    with override_settings(HTML_MINIFY_ENABLED=False, **overrides):
+        return Client().get(url, HTTP_ACCEPT_ENCODING='identity').content
+
+
+def _asset_size(url) -> int:
+    path = urlsplit(url).path[len(settings.STATIC_URL):]
+    if path.startswith(BUNDLE_PREFIX):
+        return len(build_bundle(path[len(BUNDLE_PREFIX):]).encode())
+    with open(finders.find(path), 'rb') as file:
+        return len(file.read())
+
+
+@benchmark('compression')
+def compression(number):
+    """Размер главной страницы и время обработки при разных вариантах."""
+    html = _render_page(reverse('posts:index'))
+    minified = minify_html(html.decode()).encode()
+    variants = [
+        ('исходный', lambda: html, html),
+        ('минификация', lambda: minify_html(html.decode()), minified),
+        ('gzip', lambda: compress(html, 'gzip'), compress(html, 'gzip')),
+        (
+            'минификация + gzip',
+            lambda: compress(minify_html(html.decode()).encode(), 'gzip'),
+            compress(minified, 'gzip'),
+        ),
+    ]
+    if brotli is not None:
+        variants.append((
+            'минификация + br',
+            lambda: compress(minify_html(html.decode()).encode(), 'br'),
+            compress(minified, 'br'),
+        ))
+    return [
+        {
+            'вариант': name,
+            'байт': len(result),
+            '% от исходного': len(result) * 100 / len(html),
+            'мс на ответ': measure(func, number),
+        }
+        for name, func, result in variants
+    ]
+
+
+@benchmark('assets')
+def assets(number):
+    """Число запросов за CSS/JS на главной без бандлов и с бандлами."""
+    rows = []
+    for name, enabled in (('исходные файлы', False), ('бандлы', True)):
+        html = _render_page(
+            reverse('posts:index'), ASSET_BUNDLES_ENABLED=enabled
+        ).decode()
+        urls = ASSET_URL_RE.findall(html)
+        rows.append({
+            'вариант': name,
+            'запросов': len(urls),
+            'внешних хостов': len({
+                urlsplit(url).netloc for url in urls if urlsplit(url).netloc
+            }),
+            'байт': sum(
+                _asset_size(url) for url in urls if not urlsplit(url).netloc
+            ),
+        })
+    return rows
+
+
+@benchmark('context_processors')
+def context_processors(number):
+    """Стоимость контекст-процессоров на один рендер страницы."""
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    engine = engines['django']
+    rows = [
+        (
+            f'{processor.__module__}.{processor.__name__}',
+            lambda processor=processor: processor(request),
+        )
+        for processor in engine.engine.template_context_processors
+    ]
+    rows += [
+        (
+            'было: debug',
+            lambda: django_processors.debug(request),
+        ),
+        (
+            'было: year через strftime',
+            lambda: {'year': int(dt.datetime.now().strftime('%Y'))},
+        ),
+        (
+            'рендер пустого шаблона с request',
+            lambda: engine.from_string('').render({}, request),
+        ),
+    ]
+    return [
+        {'процессор': name, 'мкс на вызов': measure(func, number) * 1000}
+        for name, func in rows
+    ]
+
+
+def _default_renderer(debug):
+    renderer = DjangoTemplates()
+    # Движок создаётся при первом обращении и запоминает DEBUG.
+    with override_settings(DEBUG=debug):
+        renderer.engine
+    return renderer
+
+
+@benchmark('forms')
+def forms(number):
+    """Рендер всех полей форм: addclass на каждом поле против классов,
+    добавленных при создании формы, и кэша шаблонов виджетов."""
+    from posts.forms import CommentForm, PostForm
+    from users.forms import CreationForm
+
+    renderers = [
+        ('было: addclass, DEBUG', _default_renderer(True), True),
+        ('было: addclass, без DEBUG', _default_renderer(False), True),
+        ('StyledFormMixin + кэш шаблонов', CachedTemplatesRenderer(), False),
+    ]
+    rows = []
+    for form_class in (PostForm, CommentForm, CreationForm):
+        for name, renderer, with_attrs in renderers:
+            attrs = {'class': DEFAULT_WIDGET_CLASS} if with_attrs else None
+
+            def render(form_class=form_class, renderer=renderer,
+                       attrs=attrs):
+                form = form_class(renderer=renderer)
+                return ''.join(field.as_widget(attrs=attrs) for field in form)
+
+            rows.append({
+                'форма': form_class.__name__,
+                'вариант': name,
+                'мс на рендер': measure(render, number),
+            })
+    return rows
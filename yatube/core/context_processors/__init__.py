@@ -0,0 +1,19 @@
+from functools import wraps
+
+from django.utils.functional import SimpleLazyObject
+
+
+def lazy_context(processor):
+    """Делает значения контекст-процессора ленивыми.
+
+    Обёрнутый процессор возвращает словарь функций без аргументов;
+    каждая вызывается, только когда шаблон впервые обратится
+    к переменной, и не больше одного раза за рендер.
+    """
+    @wraps(processor)
+    def wrapper(request):
+        return {
+            name: SimpleLazyObject(factory)
+            for name, factory in processor(request).items()
+        }
+    return wrapper
@@ -0,0 +1,12 @@
+from posts.utils.follow_graph import get_following_ids
+
+from . import lazy_context
+
+
+@lazy_context
+def following(request):
+    """Добавляет множество id авторов, на которых подписан пользователь.
+
+    Страницы без кнопок подписки не делают лишних запросов.
+    """
+    return {'following_ids': lambda: get_following_ids(request.user)}
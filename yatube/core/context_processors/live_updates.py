@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def live_updates(request):
+    """Включены ли живые обновления лент (EVENT_STREAMS_ENABLED)."""
+    return {'live_updates': settings.EVENT_STREAMS_ENABLED}
@@ -1,8 +1,20 @@
 import datetime as dt
+import time
+
+# (год, момент смены года в секундах epoch) - считается раз в год.
+_cached_year = (0, 0.0)
+
+
+def current_year() -> int:
+    global _cached_year
+    value, expires = _cached_year
+    if time.time() >= expires:
+        value = dt.datetime.now().year
+        expires = dt.datetime(value + 1, 1, 1).timestamp()
+        _cached_year = (value, expires)
+    return value
 
 
 def year(request):
     """Добавляет переменную с текущим годом."""
-    return {
-        'year': int(dt.datetime.now().strftime('%Y'))
-    }
+    return {'year': current_year()}
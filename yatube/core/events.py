@@ -0,0 +1,112 @@
+"""Внутрипроцессная шина событий для потоков server-sent events.
+
+Каждый воркер держит свою шину: подписчики получают только события,
+опубликованные в этом же процессе. Поток занимает поток WSGI-сервера
+на всё время соединения, поэтому потоки включаются настройкой
+EVENT_STREAMS_ENABLED, а их число в воркере ограничено
+EVENT_STREAM_MAX_CONNECTIONS (по умолчанию половина WSGI_THREADS).
+"""
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+QUEUE_SIZE: int = 100
+
+
+class TooManyConnections(Exception):
+    """Достигнут лимит одновременных потоков событий в воркере."""
+
+
+class EventStream:
+    """Итератор SSE-сообщений для одной подписки.
+
+    Передаётся прямо в StreamingHttpResponse: Django вызовет `close`
+    при закрытии ответа, даже если поток не успел начаться.
+    """
+
+    def __init__(self, bus, channels, heartbeat, max_age):
+        self._bus = bus
+        self._channels = channels
+        self._heartbeat = heartbeat
+        self._deadline = time.monotonic() + max_age
+        self._closed = False
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        timeout = min(self._heartbeat, self._deadline - time.monotonic())
+        if timeout <= 0:
+            self.close()
+            raise StopIteration
+        try:
+            event, data = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return b': ping\n\n'
+        payload = json.dumps(data, cls=DjangoJSONEncoder)
+        return f'event: {event}\ndata: {payload}\n\n'.encode()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._bus.unsubscribe(self, self._channels)
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._connections = 0
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def subscribe(self, channels) -> EventStream:
+        """Открывает поток событий по каналам `channels`."""
+        with self._lock:
+            if self._connections >= settings.EVENT_STREAM_MAX_CONNECTIONS:
+                raise TooManyConnections
+            self._connections += 1
+            stream = EventStream(
+                self,
+                tuple(channels),
+                settings.EVENT_STREAM_HEARTBEAT,
+                settings.EVENT_STREAM_MAX_AGE,
+            )
+            for channel in stream._channels:
+                self._subscribers[channel].add(stream)
+        return stream
+
+    def unsubscribe(self, stream, channels) -> None:
+        with self._lock:
+            self._connections -= 1
+            for channel in channels:
+                self._subscribers[channel].discard(stream)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, event, data) -> None:
+        """Рассылает событие подписчикам канала, не блокируясь на медленных.
+
+        Если очередь подписчика переполнена, событие для него теряется:
+        клиент всё равно увидит его после перезагрузки страницы.
+        """
+        with self._lock:
+            streams = list(self._subscribers.get(channel, ()))
+        for stream in streams:
+            try:
+                stream.queue.put_nowait((event, data))
+            except queue.Full:
+                pass
+
+
+event_bus = EventBus()
@@ -0,0 +1,49 @@
+"""Быстрый рендер виджетов форм.
+
+  * CachedTemplatesRenderer (settings.FORM_RENDERER) компилирует шаблоны
+    виджетов один раз на процесс. Стандартный рендерер Django в DEBUG
+    читает и разбирает их с диска при каждом выводе поля.
+  * StyledFormMixin добавляет CSS-класс виджетам при создании формы,
+    поэтому поле выводится просто `{{ field }}`, без фильтра addclass.
+"""
+from django.forms.renderers import ROOT, DjangoTemplates
+from django.utils.functional import cached_property
+
+DEFAULT_WIDGET_CLASS = 'form-control'
+
+
+class CachedTemplatesRenderer(DjangoTemplates):
+    @cached_property
+    def engine(self):
+        return self.backend({
+            'APP_DIRS': False,
+            'DIRS': [str(ROOT / self.backend.app_dirname)],
+            'NAME': 'djangoforms',
+            'OPTIONS': {
+                'loaders': [(
+                    'django.template.loaders.cached.Loader', [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ],
+                )],
+            },
+        })
+
+
+def add_css_class(attrs: dict, css: str) -> None:
+    """Добавляет класс в attrs виджета, не повторяя уже имеющиеся."""
+    classes = attrs.get('class', '').split()
+    for name in css.split():
+        if name not in classes:
+            classes.append(name)
+    attrs['class'] = ' '.join(classes)
+
+
+class StyledFormMixin:
+    widget_css_class = DEFAULT_WIDGET_CLASS
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # self.fields - глубокая копия base_fields, виджеты можно менять.
+        for field in self.fields.values():
+            add_css_class(field.widget.attrs, self.widget_css_class)
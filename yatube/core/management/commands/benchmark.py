@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import get_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Запускает микробенчмарки из модулей <приложение>/benchmarks.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*', help='Имена бенчмарков; по умолчанию все.'
+        )
+        parser.add_argument(
+            '--number', type=int, default=100, help='Число повторов.'
+        )
+
+    def handle(self, *args, **options):
+        benchmarks = get_benchmarks()
+        unknown = set(options['names']) - set(benchmarks)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные бенчмарки: {", ".join(sorted(unknown))}. '
+                f'Доступны: {", ".join(benchmarks)}.'
+            )
+        for name in options['names'] or benchmarks:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            rows = benchmarks[name](options['number'])
+            self.write_table(rows)
+
+    def write_table(self, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        cells = [
+            [self.format(row[column]) for column in columns] for row in rows
+        ]
+        widths = [
+            max(len(column), *(len(line[index]) for line in cells))
+            for index, column in enumerate(columns)
+        ]
+        for line in [columns, *cells]:
+            self.stdout.write('  '.join(
+                cell.rjust(width) for cell, width in zip(line, widths)
+            ))
+
+    @staticmethod
+    def format(value) -> str:
+        return f'{value:.3f}' if isinstance(value, float) else str(value)
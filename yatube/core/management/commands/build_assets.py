@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.assets import write_bundles
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает бандлы из ASSET_BUNDLES в ASSET_BUNDLE_DIR. '
+        'Запускается перед collectstatic.'
+    )
+
+    def handle(self, *args, **options):
+        for name, size in write_bundles().items():
+            self.stdout.write(
+                f'{name}: {size} байт из {len(settings.ASSET_BUNDLES[name])} '
+                f'файлов'
+            )
@@ -0,0 +1,100 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+BOOT_CODE = 'import yatube.wsgi'
+# Что дополнительно делает первый запрос: загружает URLconf (а с ним
+# все views) и шаблонные библиотеки установленных приложений.
+FIRST_REQUEST_CODE = (
+    'from django.urls import get_resolver; get_resolver().url_patterns; '
+    'from django.template import engines; '
+    "engines['django'].engine.template_libraries"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет время старта воркера (импорт yatube.wsgi) в отдельном '
+        'процессе и показывает, какие модули импортируются дольше всего.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--first-request', action='store_true',
+            help='Учитывать также импорты, которые делает первый запрос.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Сколько модулей и пакетов показать.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз запустить процесс для замера времени.',
+        )
+
+    def handle(self, *args, **options):
+        code = BOOT_CODE
+        if options['first_request']:
+            code = f'{code}; {FIRST_REQUEST_CODE}'
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+        }
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            subprocess.run(
+                [sys.executable, '-c', code], env=env, check=True,
+                cwd=settings.BASE_DIR,
+            )
+            timings.append(time.perf_counter() - started)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Старт процесса ({settings.SETTINGS_MODULE}): медиана '
+            f'{statistics.median(timings) * 1000:.0f} мс из {len(timings)}'
+        ))
+
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code], env=env,
+            check=True, cwd=settings.BASE_DIR, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        modules = []
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                modules.append((
+                    int(match.group(1)), int(match.group(2)), match.group(4)
+                ))
+        packages = defaultdict(int)
+        for self_us, _, name in modules:
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write(
+            f'Импортировано модулей: {len(modules)}, '
+            f'суммарно {sum(packages.values()) / 1000:.0f} мс'
+        )
+        self.write_rows(
+            'Пакеты (собственное время всех модулей пакета)',
+            sorted(packages.items(), key=lambda item: -item[1]),
+            options['top'],
+        )
+        self.write_rows(
+            'Модули (с учётом вложенных импортов)',
+            sorted(
+                ((name, cumulative) for _, cumulative, name in modules),
+                key=lambda item: -item[1],
+            ),
+            options['top'],
+        )
+
+    def write_rows(self, title, rows, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, microseconds in rows[:top]:
+            self.stdout.write(f'{microseconds / 1000:8.1f} мс  {name}')
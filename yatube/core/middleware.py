@@ -0,0 +1,170 @@
+"""Сжатие ответов и минификация HTML.
+
+CompressionMiddleware заменяет django.middleware.gzip.GZipMiddleware:
+  * выбирает brotli (если установлен пакет `brotli`) или gzip
+    по заголовку Accept-Encoding;
+  * перед сжатием убирает из HTML отступы и пустые строки, не трогая
+    содержимое <pre>, <textarea>, <script> и <style>;
+  * не сжимает короткие и уже сжатые ответы, а также поток
+    text/event-stream, который должен уходить клиенту без буферизации;
+  * потоковые ответы сжимает по частям, без минификации.
+"""
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL: int = 6
+GZIP_WBITS: int = 16 + zlib.MAX_WBITS
+BROTLI_QUALITY: int = 5
+SKIP_CONTENT_TYPES = ('text/event-stream', 'image/', 'video/', 'audio/')
+
+PRESERVED_BLOCK_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL,
+)
+INDENT_RE = re.compile(r'\n\s+')
+
+
+def minify_html(html: str) -> str:
+    """Схлопывает переводы строк с отступами в один перевод строки.
+
+    Пробельный символ между тегами остаётся, поэтому отображение
+    страницы не меняется.
+    """
+    parts = PRESERVED_BLOCK_RE.split(html)
+    # split возвращает [текст, блок, имя тега, текст, блок, имя, ...].
+    result = []
+    for index in range(0, len(parts), 3):
+        result.append(INDENT_RE.sub('\n', parts[index]))
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return ''.join(result).strip() + '\n'
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Кодировки из Accept-Encoding с q больше нуля.
+
+    Некорректное значение q считается нулём: клиент не должен получить
+    кодировку, которую, возможно, запретил.
+    """
+    accepted = set()
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str):
+    """Возвращает 'br', 'gzip' или None; кодировки с q=0 не считаются."""
+    accepted = accepted_encodings(accept_encoding)
+    if 'br' in accepted and brotli is not None:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding: str):
+    """Сжимает поток, отдавая каждую часть сразу после получения."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '')
+        if (
+            response.has_header('Content-Encoding')
+            or content_type.startswith(SKIP_CONTENT_TYPES)
+        ):
+            return response
+        if response.streaming:
+            return self._compress_streaming(request, response)
+        if (
+            settings.HTML_MINIFY_ENABLED
+            and content_type.startswith('text/html')
+            and response.status_code == 200
+        ):
+            self._minify(response)
+        if len(response.content) < settings.COMPRESSION_MIN_LENGTH:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        self._finalize(response, encoding)
+        return response
+
+    def _minify(self, response):
+        charset = response.charset
+        minified = minify_html(
+            response.content.decode(charset)
+        ).encode(charset)
+        response.content = minified
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(minified))
+
+    def _compress_streaming(self, request, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        response.streaming_content = compress_stream(
+            response.streaming_content, encoding
+        )
+        if response.has_header('Content-Length'):
+            del response['Content-Length']
+        self._finalize(response, encoding)
+        return response
+
+    @staticmethod
+    def _finalize(response, encoding):
+        # Как и GZipMiddleware: сжатое тело не побайтно равно исходному.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
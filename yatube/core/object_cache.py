@@ -0,0 +1,169 @@
+"""Кэш отдельных объектов моделей с версионной инвалидацией.
+
+Объект хранится под ключом `objcache:<модель>:<pk>:<версия>`; версия
+лежит в отдельном ключе и заменяется новой при каждом save/delete,
+поэтому устаревшие копии просто перестают читаться. Поиск по
+уникальному полю (slug, username) идёт через ключ-алиас поле -> pk.
+
+Изменения в обход сигналов (QuerySet.update, bulk_create) нужно
+сопровождать вызовом `bump_version`.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+
+OBJECT_TIMEOUT: int = 60 * 60
+# Запоминается вместо отсутствующего объекта; создание объекта с этим
+# pk меняет версию, и метка перестаёт читаться.
+NOT_FOUND = 'objcache:not-found'
+
+_lookup_fields: dict = {}
+_deferred_fields: dict = {}
+
+
+def _label(model) -> str:
+    return model._meta.label_lower
+
+
+def _version_key(model, pk) -> str:
+    return f'objcache:v:{_label(model)}:{pk}'
+
+
+def _object_key(model, pk, version) -> str:
+    return f'objcache:{_label(model)}:{pk}:{version}'
+
+
+def _alias_key(model, field, value) -> str:
+    return f'objcache:alias:{_label(model)}:{field}:{value}'
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _get_versions(model, pks) -> dict:
+    version_keys = {_version_key(model, pk): pk for pk in pks}
+    versions = {
+        version_keys[key]: version
+        for key, version in cache.get_many(version_keys).items()
+    }
+    # Перезаписать чужую версию здесь безопасно: объекты читаются из БД
+    # уже после записи версий, поэтому под новой версией не окажется
+    # копии старше изменения, которое сдвинуло затёртую версию.
+    new_versions = {pk: _new_version() for pk in pks if pk not in versions}
+    if new_versions:
+        cache.set_many(
+            {
+                _version_key(model, pk): version
+                for pk, version in new_versions.items()
+            },
+            None,
+        )
+        versions.update(new_versions)
+    return versions
+
+
+def bump_version(model, pk) -> None:
+    """Делает недействительной закэшированную копию объекта."""
+    cache.set(_version_key(model, pk), _new_version(), None)
+
+
+def get_many(model, pks) -> dict:
+    """Возвращает {pk: объект} для найденных объектов.
+
+    Закэшированные объекты читаются одним get_many, остальные
+    догружаются одним запросом и сохраняются одним set_many.
+    Отсутствие объекта тоже кэшируется.
+    """
+    pks = list(dict.fromkeys(pks))
+    versions = _get_versions(model, pks)
+    object_keys = {
+        _object_key(model, pk, versions[pk]): pk for pk in pks
+    }
+    objects = {
+        object_keys[key]: obj
+        for key, obj in cache.get_many(object_keys).items()
+    }
+    missing = [pk for pk in pks if pk not in objects]
+    if missing:
+        fetched = model._default_manager.defer(
+            *_deferred_fields.get(model, ())
+        ).in_bulk(missing)
+        cache.set_many(
+            {
+                _object_key(model, pk, versions[pk]): fetched.get(
+                    pk, NOT_FOUND
+                )
+                for pk in missing
+            },
+            OBJECT_TIMEOUT,
+        )
+        objects.update(fetched)
+    return {pk: obj for pk, obj in objects.items() if obj != NOT_FOUND}
+
+
+def get_object(model, pk):
+    """Возвращает объект по pk или None, если его нет."""
+    return get_many(model, [pk]).get(pk)
+
+
+def get_object_or_404(model, **lookup):
+    """Аналог django.shortcuts.get_object_or_404 с чтением из кэша.
+
+    Поддерживает поиск по pk/id и по полям, переданным в `register`.
+    """
+    (field, value), = lookup.items()
+    if field in ('pk', 'id'):
+        obj = get_object(model, value)
+    else:
+        if field not in _lookup_fields.get(model, ()):
+            raise ValueError(
+                f'{model.__name__}.{field} не зарегистрировано в object_cache'
+            )
+        alias_key = _alias_key(model, field, value)
+        pk = cache.get(alias_key)
+        obj = get_object(model, pk) if pk is not None else None
+        if obj is None or getattr(obj, field) != value:
+            pk = model._default_manager.filter(
+                **{field: value}
+            ).values_list('pk', flat=True).first()
+            obj = get_object(model, pk) if pk is not None else None
+            if obj is not None:
+                cache.set(alias_key, pk, OBJECT_TIMEOUT)
+    if obj is None:
+        raise Http404(f'No {model._meta.object_name} matches the query.')
+    return obj
+
+
+def attach_related(obj, *field_names) -> None:
+    """Подставляет в obj связанные объекты из кэша вместо запросов к БД."""
+    for name in field_names:
+        field = obj._meta.get_field(name)
+        related_pk = getattr(obj, field.attname)
+        if related_pk is not None and field.related_model in _lookup_fields:
+            related = get_object(field.related_model, related_pk)
+            if related is not None:
+                setattr(obj, name, related)
+
+
+def _invalidate(sender, instance, **kwargs):
+    bump_version(sender, instance.pk)
+
+
+def register(model, *lookup_fields, defer=()) -> None:
+    """Включает кэширование объектов модели.
+
+    `lookup_fields` - уникальные поля, по которым разрешён поиск
+    в `get_object_or_404`. Поля из `defer` (например, хэш пароля)
+    не загружаются и не попадают в кэш.
+    """
+    _lookup_fields[model] = lookup_fields
+    _deferred_fields[model] = defer
+    post_save.connect(
+        _invalidate, sender=model, dispatch_uid=f'objcache_save_{model}'
+    )
+    post_delete.connect(
+        _invalidate, sender=model, dispatch_uid=f'objcache_delete_{model}'
+    )
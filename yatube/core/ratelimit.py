@@ -0,0 +1,137 @@
+"""Ограничение частоты запросов по алгоритму скользящего окна.
+
+Для каждого ключа хранятся два счётчика в кэше - для текущего и
+предыдущего окна. Оценка числа запросов за последние `window` секунд:
+    previous * (1 - elapsed / window) + current
+Счётчики увеличиваются атомарным cache.incr, на ключ приходится
+два целых числа.
+
+Политики задаются в settings.RATELIMITS:
+    RATELIMITS = {'post_create': {'user': '10/m', 'ip': '30/m'}}
+
+За обратным прокси IP клиента берётся из заголовка
+RATELIMIT_IP_HEADER с учётом RATELIMIT_TRUSTED_PROXIES, иначе все
+клиенты делили бы один счётчик адреса прокси.
+"""
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+COUNTER_KEY = 'ratelimit:{name}:{scope}:{ident}:{window}'
+REJECTED_KEY = 'ratelimit:rejected:{name}'
+
+
+def parse_rate(rate: str):
+    """Разбирает строку вида '10/m' в пару (лимит, окно в секундах)."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period]
+
+
+def _incr(key, timeout) -> int:
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def hit(name, scope, ident, rate, now=None):
+    """Учитывает запрос и возвращает (превышен ли лимит, ждать секунд)."""
+    limit, window = parse_rate(rate)
+    now = time.time() if now is None else now
+    current_window = int(now // window)
+    elapsed = now - current_window * window
+    key = COUNTER_KEY.format(name=name, scope=scope, ident=ident, window='')
+    current = _incr(f'{key}{current_window}', window * 2)
+    previous = cache.get(f'{key}{current_window - 1}', 0)
+    estimate = previous * (1 - elapsed / window) + current
+    return estimate > limit, int(window - elapsed) + 1
+
+
+def get_client_ip(request) -> str:
+    """IP клиента с учётом RATELIMIT_TRUSTED_PROXIES доверенных прокси.
+
+    Каждый прокси дописывает в конец заголовка адрес, от которого
+    получил запрос, поэтому клиентом считается N-й адрес с конца:
+    всё левее него мог подставить сам клиент.
+    """
+    proxies = settings.RATELIMIT_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [
+            address.strip()
+            for address in request.META.get(
+                settings.RATELIMIT_IP_HEADER, ''
+            ).split(',')
+            if address.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _identities(request, policy):
+    if 'user' in policy and request.user.is_authenticated:
+        yield 'user', request.user.pk, policy['user']
+    if 'ip' in policy:
+        yield 'ip', get_client_ip(request), policy['ip']
+
+
+def get_rejected_count(name) -> int:
+    """Число отклонённых запросов политики `name` (метрика)."""
+    return cache.get(REJECTED_KEY.format(name=name), 0)
+
+
+def _reject(request, name, retry_after):
+    _incr(REJECTED_KEY.format(name=name), None)
+    logger.warning(
+        'Rate limit "%s" exceeded by %s (user %s)',
+        name, get_client_ip(request), request.user.pk,
+    )
+    if request.path_info.startswith(settings.RATELIMIT_JSON_PATHS):
+        response = JsonResponse(
+            {
+                'detail': 'Слишком много запросов.',
+                'retry_after': retry_after,
+            },
+            status=429,
+        )
+    else:
+        response = render(
+            request, 'core/429.html', {'retry_after': retry_after},
+            status=429,
+        )
+    response['Retry-After'] = retry_after
+    return response
+
+
+def ratelimit(name, methods=('POST',)):
+    """Ограничивает частоту запросов к view по политике RATELIMITS[name].
+
+    Учитываются только запросы с методами из `methods`;
+    methods=None ограничивает все запросы.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            policy = settings.RATELIMITS.get(name)
+            if (
+                policy
+                and settings.RATELIMIT_ENABLED
+                and (methods is None or request.method in methods)
+            ):
+                for scope, ident, rate in _identities(request, policy):
+                    limited, retry_after = hit(name, scope, ident, rate)
+                    if limited:
+                        return _reject(request, name, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
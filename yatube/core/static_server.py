@@ -0,0 +1,142 @@
+"""WSGI-обёртка, отдающая статику и медиа без вызова Django.
+
+Запросы к STATIC_URL и MEDIA_URL обслуживаются прямо с диска:
+  * предсжатые `.br`/`.gz` копии выбираются по Accept-Encoding;
+  * файлы с хэшем в имени (манифест collectstatic, медиа
+    ContentAddressedStorage) получают `Cache-Control: immutable`;
+  * поддерживаются ETag/If-None-Match, HEAD и одиночный Range.
+Если файла нет, запрос передаётся приложению Django как обычно.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from urllib.parse import unquote
+
+from django.conf import settings
+
+from .middleware import accepted_encodings
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE = 'public, max-age=60'
+HASHED_NAME_RE = re.compile(r'(\.[0-9a-f]{12}\.[^./]+|/[0-9a-f]{64}\.[^./]+)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE: int = 64 * 1024
+
+
+def _file_iterator(file, length):
+    with file:
+        while length > 0:
+            chunk = file.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class StaticServer:
+    def __init__(self, application, mounts=None):
+        self.application = application
+        if mounts is None:
+            mounts = [
+                (settings.STATIC_URL, settings.STATIC_ROOT),
+                (settings.MEDIA_URL, settings.MEDIA_ROOT),
+            ]
+        self.mounts = [
+            (url, os.path.realpath(root)) for url, root in mounts
+            if url and root
+        ]
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            path = self.find_file(environ.get('PATH_INFO', ''))
+            if path is not None:
+                return self.serve(path, environ, start_response)
+        return self.application(environ, start_response)
+
+    def find_file(self, url_path):
+        """Возвращает путь к файлу на диске или None."""
+        url_path = unquote(url_path)
+        for url, root in self.mounts:
+            if not url_path.startswith(url):
+                continue
+            path = os.path.realpath(
+                os.path.join(root, url_path[len(url):].lstrip('/'))
+            )
+            if os.path.commonpath([root, path]) == root and (
+                os.path.isfile(path)
+            ):
+                return path
+        return None
+
+    def _choose_variant(self, path, environ):
+        accepted = accepted_encodings(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + suffix):
+                return path + suffix, encoding
+        return path, None
+
+    def serve(self, path, environ, start_response):
+        content_type, _ = mimetypes.guess_type(path)
+        variant, encoding = self._choose_variant(path, environ)
+        stat = os.stat(variant)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}-{encoding or ""}"'
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control', (
+                IMMUTABLE_CACHE if HASHED_NAME_RE.search(path)
+                else DEFAULT_CACHE
+            )),
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        else:
+            headers.append(('Accept-Ranges', 'bytes'))
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+
+        status, start, length = '200 OK', 0, stat.st_size
+        range_header = environ.get('HTTP_RANGE', '').strip()
+        if RANGE_RE.match(range_header) and not encoding:
+            byte_range = self._parse_range(range_header, stat.st_size)
+            if byte_range is None:
+                headers.append(('Content-Range', f'bytes */{stat.st_size}'))
+                start_response('416 Range Not Satisfiable', headers)
+                return []
+            start, end = byte_range
+            length = end - start + 1
+            status = '206 Partial Content'
+            headers.append(
+                ('Content-Range', f'bytes {start}-{end}/{stat.st_size}')
+            )
+        headers.append(('Content-Length', str(length)))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(variant, 'rb')
+        file.seek(start)
+        if length == stat.st_size and 'wsgi.file_wrapper' in environ:
+            return environ['wsgi.file_wrapper'](file, BLOCK_SIZE)
+        return _file_iterator(file, length)
+
+    @staticmethod
+    def _parse_range(header, size):
+        """Разбирает одиночный диапазон `bytes=a-b`; None - невыполним."""
+        first, last = RANGE_RE.match(header).groups()
+        if not first and not last:
+            return None
+        if not first:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        if start > end or start >= size:
+            return None
+        return start, end
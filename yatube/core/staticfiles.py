@@ -0,0 +1,59 @@
+"""Хранилище статики с хэшированными именами и сжатыми копиями.
+
+После `collectstatic` рядом с каждым хэшированным файлом появляются
+`.gz` и, если установлен пакет `brotli`, `.br`; их отдаёт
+`core.static_server.StaticServer` без участия Django.
+"""
+import gzip
+import io
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.html', '.xml',
+)
+MIN_COMPRESS_SIZE: int = 256
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+        fileobj=buffer, mode='wb', compresslevel=9, mtime=0
+    ) as gzip_file:
+        gzip_file.write(data)
+    return buffer.getvalue()
+
+
+def write_compressed_variants(path) -> list:
+    """Пишет path.gz и path.br, если они меньше оригинала."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    variants = [('.gz', gzip_bytes)]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress))
+    written = []
+    for suffix, compress in variants:
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                write_compressed_variants(self.path(name))
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import posixpath
+import time
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_SIZE: int = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем, равным sha256 от содержимого.
+
+    `posts/photo.jpg` сохраняется как `posts/ab/ab12...ef.jpg`; если такой
+    файл уже есть, повторная загрузка ничего не пишет и возвращает его
+    имя. Одинаковые картинки разных постов делят один файл и одни
+    миниатюры sorl, поэтому удалять файл можно только после проверки,
+    что на него больше никто не ссылается, - см. `delete_unused`.
+
+    Повторная загрузка обновляет время изменения файла: пока строка
+    с новой ссылкой ещё не записана в БД, файл считается занятым.
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        name = posixpath.join(
+            posixpath.dirname(name), digest[:2], digest + extension
+        )
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                # Файл удаляют прямо сейчас - пишем новую копию.
+                pass
+        return super()._save(name, content)
+
+    def delete_unused(self, name, in_use, min_age: float) -> bool:
+        """Удаляет файл, если in_use() ложно и файл старше min_age секунд.
+
+        Файл сначала атомарно переименовывается, и только потом
+        проверяются ссылки и возраст: загрузка того же содержимого в это
+        время либо успеет обновить время изменения, либо запишет новую
+        копию. Если файл занят, он возвращается на место.
+        """
+        path = self.path(name)
+        trash = f'{path}.{uuid.uuid4().hex}.deleting'
+        try:
+            os.rename(path, trash)
+        except FileNotFoundError:
+            return False
+        if in_use() or time.time() - os.stat(trash).st_mtime < min_age:
+            try:
+                os.link(trash, path)
+            except FileExistsError:
+                # Пока файла не было, загрузили его новую копию.
+                pass
+            os.remove(trash)
+            return False
+        os.remove(trash)
+        return True
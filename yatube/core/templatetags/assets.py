@@ -0,0 +1,38 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from core.assets import bundle_paths
+
+register = template.Library()
+
+TAGS = {
+    '.css': '<link rel="stylesheet" href="{}">',
+    '.js': '<script defer src="{}"></script>',
+}
+PRELOAD_AS = {'.css': 'style', '.js': 'script'}
+
+
+def _extension(name) -> str:
+    return name[name.rfind('.'):]
+
+
+@register.simple_tag
+def bundle(name):
+    """Подключает бандл или, если бандлы выключены, его исходники."""
+    return format_html_join(
+        '\n', TAGS[_extension(name)],
+        ((static(path),) for path in bundle_paths(name)),
+    )
+
+
+@register.simple_tag
+def preload_bundle(name):
+    """Подсказка браузеру начать загрузку бандла до разбора <body>."""
+    return format_html_join(
+        '\n', '<link rel="preload" href="{}" as="{}">',
+        (
+            (static(path), PRELOAD_AS[_extension(name)])
+            for path in bundle_paths(name)
+        ),
+    )
@@ -5,4 +5,12 @@ register = template.Library()
 
 @register.filter
 def addclass(field, css):
-    return field.as_widget(attrs={'class': css})
+    """Выводит поле с CSS-классом, сохраняя уже заданные классы.
+
+    Формам с StyledFormMixin класс добавлен при создании, для них
+    поле выводится без копирования и слияния attrs.
+    """
+    current = field.field.widget.attrs.get('class', '').split()
+    if all(name in current for name in css.split()):
+        return field.as_widget()
+    return field.as_widget(attrs={'class': ' '.join([*current, css])})
@@ -0,0 +1,93 @@
+"""Тест-раннер: параллельный запуск по умолчанию и отчёт о медленных тестах.
+
+`manage.py test` раскладывает классы тестов по процессам (по числу
+ядер); каждый процесс получает свою копию тестовой SQLite-базы.
+В конце печатается `--durations` самых медленных тестов
+(0 - не печатать). Для отладки: `manage.py test --parallel 1`.
+"""
+import time
+import unittest
+
+from django.test.runner import (DiscoverRunner, ParallelTestSuite,
+                                RemoteTestResult, RemoteTestRunner,
+                                default_test_processes)
+
+
+class TimedTextTestResult(unittest.TextTestResult):
+    """Запоминает длительность каждого теста.
+
+    При параллельном запуске длительность приходит из процесса-воркера
+    событием addDuration, иначе измеряется здесь же.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+        self._started = None
+        self._duration = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+        self._duration = None
+
+    def addDuration(self, test, elapsed):
+        self._duration = elapsed
+
+    def stopTest(self, test):
+        if self._duration is None:
+            self._duration = time.perf_counter() - self._started
+        self.durations.append((self._duration, str(test)))
+        super().stopTest(test)
+
+
+class TimedRemoteTestResult(RemoteTestResult):
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+
+    def stopTest(self, test):
+        self.events.append((
+            'addDuration', self.test_index,
+            time.perf_counter() - self._started,
+        ))
+        super().stopTest(test)
+
+
+class TimedRemoteTestRunner(RemoteTestRunner):
+    resultclass = TimedRemoteTestResult
+
+
+class TimedParallelTestSuite(ParallelTestSuite):
+    runner_class = TimedRemoteTestRunner
+
+
+class TimedDiscoverRunner(DiscoverRunner):
+    parallel_test_suite = TimedParallelTestSuite
+
+    def __init__(self, durations=10, **kwargs):
+        super().__init__(**kwargs)
+        self.durations = durations
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel=default_test_processes())
+        parser.add_argument(
+            '--durations', type=int, default=10, metavar='N',
+            help='Показать N самых медленных тестов (0 - не показывать).',
+        )
+
+    def get_resultclass(self):
+        return super().get_resultclass() or TimedTextTestResult
+
+    def run_suite(self, suite, **kwargs):
+        result = super().run_suite(suite, **kwargs)
+        if self.durations and getattr(result, 'durations', None):
+            self.print_durations(result.durations)
+        return result
+
+    def print_durations(self, durations):
+        print(f'\nСамые медленные тесты ({self.durations}):')
+        for elapsed, test in sorted(durations, reverse=True)[:self.durations]:
+            print(f'{elapsed:8.3f} с  {test}')
@@ -0,0 +1,25 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+
+class TempMediaRootMixin:
+    """Отдельный временный MEDIA_ROOT для каждого класса тестов.
+
+    Каталог создаётся в setUpClass, поэтому классы, запущенные
+    в разных процессах, не удаляют файлы друг друга.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix='yatube-media-')
+        cls._media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls._media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
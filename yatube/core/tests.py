@@ -1,6 +1,38 @@
-from django.test import Client, TestCase
+import datetime as dt
+import gzip
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django import forms as django_forms
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template import Context, Template
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
 from http import HTTPStatus
 
+from posts.models import Group, Post
+
+from . import object_cache, ratelimit
+from .admin import EstimatedCountPaginator, estimate_count
+from .assets import build_bundle, bundle_paths, get_bundle, minify_css
+from .context_processors import lazy_context
+from .context_processors.year import current_year
+from .events import EventBus, TooManyConnections
+from .forms import CachedTemplatesRenderer, StyledFormMixin
+from .middleware import CompressionMiddleware, minify_html
+from .static_server import StaticServer
+from .staticfiles import write_compressed_variants
+
+User = get_user_model()
+
 
 class ViewTestClass(TestCase):
     def setUp(self):
@@ -10,3 +42,450 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='testslug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_many_reads_cache_after_first_fetch(self):
+        """get_many загружает промахи одним запросом, затем читает кэш."""
+        pks = [post.pk for post in ObjectCacheTests.posts]
+        with self.assertNumQueries(1):
+            posts = object_cache.get_many(Post, pks)
+        with self.assertNumQueries(0):
+            cached = object_cache.get_many(Post, pks)
+        self.assertEqual(set(posts), set(pks))
+        self.assertEqual(cached[pks[0]].text, 'Пост 0')
+
+    def test_cold_versions_use_one_round_trip(self):
+        """Версии промахов записываются одним set_many."""
+        pks = [post.pk for post in ObjectCacheTests.posts]
+        with mock.patch.object(
+            object_cache.cache, 'set_many', wraps=object_cache.cache.set_many
+        ) as set_many, mock.patch.object(
+            object_cache.cache, 'add', wraps=object_cache.cache.add
+        ) as add:
+            object_cache.get_many(Post, pks)
+        self.assertEqual(set_many.call_count, 2)
+        add.assert_not_called()
+
+    def test_user_password_is_not_cached(self):
+        """Хэш пароля пользователя не попадает в кэш."""
+        user = object_cache.get_object(User, ObjectCacheTests.user.pk)
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertNotIn(
+            ObjectCacheTests.user.password.encode(), pickle.dumps(user)
+        )
+
+    def test_save_bumps_version(self):
+        """Сохранение объекта делает устаревшей его копию в кэше."""
+        post = ObjectCacheTests.posts[0]
+        object_cache.get_object(Post, post.pk)
+        post.text = 'Изменённый пост'
+        post.save()
+        self.assertEqual(
+            object_cache.get_object(Post, post.pk).text, 'Изменённый пост'
+        )
+
+    def test_lookup_by_registered_field(self):
+        """Поиск по slug идёт через алиас и переживает смену slug."""
+        group = ObjectCacheTests.group
+        self.assertEqual(
+            object_cache.get_object_or_404(Group, slug='testslug'), group
+        )
+        with self.assertNumQueries(0):
+            object_cache.get_object_or_404(Group, slug='testslug')
+        group.slug = 'newslug'
+        group.save()
+        with self.assertRaises(Http404):
+            object_cache.get_object_or_404(Group, slug='testslug')
+        self.assertEqual(
+            object_cache.get_object_or_404(Group, slug='newslug'), group
+        )
+
+
+@override_settings(
+    EVENT_STREAMS_ENABLED=True,
+    EVENT_STREAM_MAX_CONNECTIONS=1,
+    EVENT_STREAM_HEARTBEAT=0.01,
+    EVENT_STREAM_MAX_AGE=1,
+)
+class EventBusTests(TestCase):
+    def setUp(self):
+        self.bus = EventBus()
+
+    def test_subscriber_receives_published_events(self):
+        """Подписчик получает события своего канала и heartbeat."""
+        stream = self.bus.subscribe(['posts:index'])
+        self.bus.publish('posts:group:1', 'post', {'id': 1})
+        self.bus.publish('posts:index', 'post', {'id': 2})
+        self.assertEqual(next(stream), b'event: post\ndata: {"id": 2}\n\n')
+        self.assertEqual(next(stream), b': ping\n\n')
+        stream.close()
+        self.assertEqual(self.bus.connections, 0)
+
+    def test_connections_are_limited(self):
+        """Число потоков в воркере ограничено настройкой."""
+        stream = self.bus.subscribe(['posts:index'])
+        with self.assertRaises(TooManyConnections):
+            self.bus.subscribe(['posts:index'])
+        stream.close()
+        self.bus.subscribe(['posts:index']).close()
+
+    def test_stream_view_rejects_over_limit(self):
+        """Поток ленты отдаёт text/event-stream, а сверх лимита - 503."""
+        response = self.client.get(reverse('posts:post_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        second = self.client.get(reverse('posts:post_stream'))
+        self.assertEqual(
+            second.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        response.close()
+
+    def test_stream_without_channels_is_not_opened(self):
+        """Без каналов или при выключенных потоках ответ сразу 204."""
+        response = self.client.get(
+            reverse('posts:post_stream'), {'feed': 'follow'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        with override_settings(EVENT_STREAMS_ENABLED=False):
+            response = self.client.get(reverse('posts:post_stream'))
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window_weights_previous_window(self):
+        """Запросы прошлого окна учитываются пропорционально остатку."""
+        for _ in range(4):
+            ratelimit.hit('test', 'ip', '1', '4/m', now=59)
+        limited, _ = ratelimit.hit('test', 'ip', '1', '4/m', now=65)
+        self.assertTrue(limited)
+        limited, _ = ratelimit.hit('test', 'ip', '1', '4/m', now=110)
+        self.assertFalse(limited)
+
+    @override_settings(RATELIMITS={'add_comment': {'user': '2/m'}})
+    def test_write_view_is_throttled(self):
+        """Сверх лимита view отвечает 429 и считает отказ в метриках."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Пост')
+        self.client.force_login(user)
+        url = reverse('posts:add_comment', kwargs={'post_id': post.pk})
+        for _ in range(2):
+            response = self.client.post(url, {'text': 'Комментарий'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.client.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTrue(response.has_header('Retry-After'))
+        self.assertEqual(post.comments.count(), 2)
+        self.assertEqual(ratelimit.get_rejected_count('add_comment'), 1)
+
+    @override_settings(RATELIMITS={'add_comment': {'ip': '1/m'}})
+    def test_api_is_throttled_with_json(self):
+        """API получает 429 в JSON с Retry-After."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Пост')
+        self.client.force_login(user)
+        url = reverse('api:comment_list', kwargs={'post_id': post.pk})
+        data = json.dumps({'text': 'Комментарий'})
+        self.client.post(url, data, content_type='application/json')
+        response = self.client.post(
+            url, data, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            response.json()['retry_after'], int(response['Retry-After'])
+        )
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=1)
+    def test_client_ip_is_taken_from_trusted_proxy(self):
+        """За прокси клиентом считается адрес, записанный прокси."""
+        request = RequestFactory().get(
+            '/', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2',
+            REMOTE_ADDR='10.0.0.1',
+        )
+        self.assertEqual(ratelimit.get_client_ip(request), '2.2.2.2')
+        with override_settings(RATELIMIT_TRUSTED_PROXIES=0):
+            self.assertEqual(ratelimit.get_client_ip(request), '10.0.0.1')
+
+
+class StaticServerTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.content = b'body { color: red; }\n' * 50
+        self.name = 'app.0123456789ab.css'
+        with open(os.path.join(self.root, self.name), 'wb') as file:
+            file.write(self.content)
+        write_compressed_variants(os.path.join(self.root, self.name))
+        self.server = StaticServer(
+            self.fallback, mounts=[('/static/', self.root)]
+        )
+
+    @staticmethod
+    def fallback(environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def request(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers}
+        response = {}
+
+        def start_response(status, response_headers):
+            response['status'] = status
+            response['headers'] = dict(response_headers)
+        body = b''.join(self.server(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_serves_precompressed_variant_with_immutable_cache(self):
+        """Хэшированный файл отдаётся сжатым и с immutable-кэшем."""
+        status, headers, body = self.request(
+            f'/static/{self.name}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(gzip.decompress(body), self.content)
+
+    def test_encoding_with_zero_quality_is_not_served(self):
+        """Кодировка с q=0 не выбирается, даже если копия есть."""
+        path = os.path.join(self.root, self.name)
+        with open(path + '.br', 'wb') as file:
+            file.write(b'brotli')
+        for accept, encoding in (
+            ('br;q=0, gzip', 'gzip'),
+            ('br; q=0.0, gzip;q=0', None),
+            ('gzip;q=0.5, br;q=1', 'br'),
+        ):
+            with self.subTest(accept=accept):
+                _, headers, _ = self.request(
+                    f'/static/{self.name}', HTTP_ACCEPT_ENCODING=accept
+                )
+                self.assertEqual(headers.get('Content-Encoding'), encoding)
+
+    def test_range_and_conditional_requests(self):
+        """Поддерживаются Range и If-None-Match."""
+        status, headers, body = self.request(
+            f'/static/{self.name}', HTTP_RANGE='bytes=5-9'
+        )
+        self.assertEqual(status, '206 Partial Content')
+        self.assertEqual(body, self.content[5:10])
+        status, _, body = self.request(
+            f'/static/{self.name}', HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual((status, body), ('304 Not Modified', b''))
+
+    def test_missing_files_and_traversal_fall_through(self):
+        """Несуществующие пути и выход за корень передаются Django."""
+        for path in ('/static/missing.css', '/static/../../etc/passwd'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)[2], b'django')
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    html = (
+        '<html>\n    <body>\n        <p>текст</p>\n'
+        '        <pre>\n    отступ\n</pre>\n    </body>\n</html>\n'
+    ) * 20
+
+    def process(self, response, accept_encoding='gzip, deflate'):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_minify_keeps_preformatted_blocks(self):
+        """Отступы убираются везде, кроме <pre> и подобных блоков."""
+        self.assertEqual(
+            minify_html('<div>\n    <pre>\n  a\n</pre>\n  <b>x</b>\n</div>'),
+            '<div>\n<pre>\n  a\n</pre>\n<b>x</b>\n</div>\n',
+        )
+
+    def test_html_is_minified_and_compressed(self):
+        """HTML минифицируется и сжимается gzip."""
+        response = self.process(HttpResponse(self.html))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            gzip.decompress(response.content).decode(),
+            minify_html(self.html),
+        )
+
+    def test_skipped_responses(self):
+        """Короткие, уже сжатые ответы и отказ клиента от gzip не сжимаются."""
+        encoded = HttpResponse(self.html)
+        encoded['Content-Encoding'] = 'identity'
+        cases = {
+            'короткий': (HttpResponse('<p>ok</p>'), 'gzip'),
+            'уже сжат': (encoded, 'gzip'),
+            'q=0': (HttpResponse(self.html), 'gzip;q=0'),
+        }
+        for name, (response, accept_encoding) in cases.items():
+            with self.subTest(name=name):
+                response = self.process(response, accept_encoding)
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_streaming_response(self):
+        """Потоковый ответ сжимается по частям, event-stream - нет."""
+        response = self.process(
+            StreamingHttpResponse(iter([b'a' * 300, b'b' * 300]))
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b'a' * 300 + b'b' * 300,
+        )
+        events = self.process(StreamingHttpResponse(
+            iter([b'data: 1\n\n']), content_type='text/event-stream'
+        ))
+        self.assertFalse(events.has_header('Content-Encoding'))
+
+
+@override_settings(ASSET_BUNDLES={
+    'site.js': ['js/popper.min.js', 'js/bootstrap.js'],
+    'site.css': ['css/styles.css'],
+})
+class AssetBundleTests(SimpleTestCase):
+    template = Template("{% load assets %}{% bundle 'site.js' %}")
+
+    def test_sources_are_served_separately_without_bundles(self):
+        """При выключенных бандлах подключаются исходные файлы."""
+        with override_settings(ASSET_BUNDLES_ENABLED=False):
+            html = self.template.render(Context())
+        self.assertEqual(html.count('<script defer src='), 2)
+        self.assertIn('/static/js/popper.min.js', html)
+
+    def test_bundle_is_served_as_one_file(self):
+        """При включённых бандлах подключается один файл."""
+        with override_settings(ASSET_BUNDLES_ENABLED=True):
+            html = self.template.render(Context())
+        self.assertEqual(
+            html, '<script defer src="/static/bundles/site.js"></script>'
+        )
+
+    def test_build_bundle(self):
+        """Бандл склеивает исходники и убирает ссылки на source map."""
+        js = build_bundle('site.js')
+        self.assertIn('exports.Tooltip', js)
+        self.assertNotIn('sourceMappingURL', js)
+        css = build_bundle('site.css')
+        self.assertNotIn('\n    ', css)
+        self.assertIn('.list-group-item:hover{', css)
+
+    def test_minify_css_keeps_license_comments(self):
+        """Обычные комментарии удаляются, /*! ... */ сохраняются."""
+        self.assertEqual(
+            minify_css('/*! MIT */\n/* note */ a { color: red; }'),
+            '/*! MIT */ a{color: red;}',
+        )
+
+    def test_unbuilt_bundle_falls_back_to_sources(self):
+        """Без записи в манифесте подключаются исходные файлы."""
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        with override_settings(
+            ASSET_BUNDLES_ENABLED=True,
+            STATIC_ROOT=static_root,
+            STATICFILES_STORAGE=(
+                'django.contrib.staticfiles.storage.'
+                'ManifestStaticFilesStorage'
+            ),
+        ), self.assertLogs('core.assets', 'WARNING'):
+            self.assertEqual(bundle_paths('site.js'), get_bundle('site.js'))
+
+
+class ContextProcessorTests(SimpleTestCase):
+    def test_lazy_context_evaluates_on_first_use(self):
+        """Значение вычисляется при первом обращении и только один раз."""
+        calls = []
+
+        @lazy_context
+        def processor(request):
+            return {'value': lambda: calls.append(1) or 'значение'}
+
+        context = processor(None)
+        self.assertEqual(calls, [])
+        self.assertEqual(
+            Template('{{ value }} {{ value }}').render(Context(context)),
+            'значение значение',
+        )
+        self.assertEqual(calls, [1])
+
+    def test_current_year(self):
+        """Год кэшируется, но совпадает с текущим."""
+        self.assertEqual(current_year(), dt.datetime.now().year)
+        self.assertEqual(current_year(), dt.datetime.now().year)
+
+
+class StyledFormTests(SimpleTestCase):
+    class Form(StyledFormMixin, django_forms.Form):
+        text = django_forms.CharField(
+            widget=django_forms.Textarea(attrs={'class': 'wide'})
+        )
+
+    def test_class_added_at_construction(self):
+        """Класс добавляется к имеющимся, base_fields не меняются."""
+        form = self.Form()
+        self.assertEqual(
+            form.fields['text'].widget.attrs['class'], 'wide form-control'
+        )
+        self.assertEqual(
+            self.Form.base_fields['text'].widget.attrs['class'], 'wide'
+        )
+
+    def test_addclass_keeps_classes(self):
+        """addclass не дублирует и не затирает классы виджета."""
+        form = self.Form()
+        html = Template(
+            '{% load user_filters %}{{ form.text|addclass:"form-control" }}'
+        ).render(Context({'form': form}))
+        self.assertIn('class="wide form-control"', html)
+
+    def test_renderer_caches_templates(self):
+        renderer = CachedTemplatesRenderer()
+        first = renderer.get_template('django/forms/widgets/text.html')
+        second = renderer.get_template('django/forms/widgets/text.html')
+        self.assertIs(first.template, second.template)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text='Пост', author=cls.user) for _ in range(5)
+        )
+
+    def test_estimate_used_only_without_filters(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimate_count(Post), 5)
+        with override_settings(ADMIN_ESTIMATED_COUNT_MIN=1):
+            paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+            with self.assertNumQueries(1):
+                self.assertEqual(paginator.count, 5)
+            filtered = EstimatedCountPaginator(
+                Post.objects.filter(pk__lte=0), 2
+            )
+            self.assertEqual(filtered.count, 0)
+
+    def test_small_estimate_counts_exactly(self):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 5)
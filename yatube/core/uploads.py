@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузки во временный файл и не принимает лишние байты.
+
+    Как только файл превышает FILE_UPLOAD_MAX_SIZE, остаток потока
+    читается вхолостую, а файл помечается атрибутом `oversized`,
+    чтобы форма могла отклонить его с понятной ошибкой.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_SIZE:
+            self.oversized = True
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.oversized = self.oversized
+        if self.oversized:
+            file.size = self.received
+        return file
@@ -1,9 +1,68 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
 
-from .models import Group, Post
+from core.admin import LargeTableAdmin
 
+from .models import Comment, Follow, Group, ModerationJob, Post
+from .utils import moderation
 
-class PostAdmin(admin.ModelAdmin):
+
+class ModerationActionForm(helpers.ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа'
+    )
+
+
+def _start_job(modeladmin, request, queryset, action, group=None):
+    job = moderation.start_job(queryset, action, request.user, group)
+    modeladmin.message_user(
+        request,
+        f'Задача {job} запущена в фоне, ход выполнения - '
+        f'в разделе «{ModerationJob._meta.verbose_name_plural}».',
+    )
+
+
+def _moderation_action(action, description, permission):
+    def run(modeladmin, request, queryset):
+        _start_job(modeladmin, request, queryset, action)
+    run.__name__ = f'background_{action}'
+    run.short_description = description
+    run.allowed_permissions = (permission,)
+    return run
+
+
+background_delete = _moderation_action(
+    ModerationJob.DELETE, 'Удалить в фоне', 'delete'
+)
+background_hide = _moderation_action(
+    ModerationJob.HIDE, 'Скрыть в фоне', 'change'
+)
+background_show = _moderation_action(
+    ModerationJob.SHOW, 'Показать в фоне', 'change'
+)
+
+
+def background_move(modeladmin, request, queryset):
+    try:
+        group = ModerationActionForm.base_fields['group'].clean(
+            request.POST.get('group')
+        )
+    except forms.ValidationError:
+        group = None
+    if group is None:
+        modeladmin.message_user(
+            request, 'Выберите группу для переноса.', messages.ERROR
+        )
+        return
+    _start_job(modeladmin, request, queryset, ModerationJob.MOVE, group)
+
+
+background_move.short_description = 'Перенести в выбранную группу в фоне'
+background_move.allowed_permissions = ('change',)
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'text',
@@ -12,10 +71,74 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    # Вместо <select> со всеми группами в каждой строке - поле поиска,
+    # вместо списка всех пользователей - поле для id.
+    autocomplete_fields = ('group',)
+    raw_id_fields = ('author',)
+    search_fields = ('text',)
+    # Фильтр по дате не делает запросов, а выборка идёт по индексу.
+    list_filter = ('pub_date', 'is_hidden')
+    date_hierarchy = 'pub_date'
+    action_form = ModerationActionForm
+    actions = (
+        background_delete, background_hide, background_show, background_move,
+    )
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class CommentAdmin(LargeTableAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'created',
+        'author',
+        'post',
+    )
+    list_select_related = ('author', 'post')
+    raw_id_fields = ('author', 'post')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
+    list_filter = ('created', 'is_hidden')
+    date_hierarchy = 'created'
+    actions = (background_delete, background_hide, background_show)
+
+
+class FollowAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'action',
+        'model',
+        'status',
+        'progress_display',
+        'created_by',
+        'created',
+        'finished',
+    )
+    list_filter = ('status', 'action')
+    list_select_related = ('created_by',)
+    readonly_fields = [field.name for field in ModerationJob._meta.fields]
+
+    def progress_display(self, job):
+        return f'{job.processed} из {job.total or "?"} ({job.progress}%)'
+
+    progress_display.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(ModerationJob, ModerationJobAdmin)
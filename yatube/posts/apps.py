@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+
+    def ready(self):
+        from core import object_cache
+
+        from . import signals  # noqa: F401
+        from .models import Group, Post, User
+
+        object_cache.register(Post)
+        object_cache.register(Group, 'slug')
+        object_cache.register(User, 'username', defer=('password',))
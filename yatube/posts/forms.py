@@ -1,15 +1,70 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+
+from core.forms import StyledFormMixin
 
 from .models import Post, Comment
 
 
-class PostForm(forms.ModelForm):
+class LimitedImageField(forms.ImageField):
+    """ImageField, который проверяет размер и разрешение до декодирования.
+
+    Размер файла сверяется с FILE_UPLOAD_MAX_SIZE, а число пикселей
+    читается из заголовка (Pillow не декодирует изображение при open),
+    поэтому огромные картинки отклоняются до полной проверки Django.
+    """
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        if (
+            getattr(data, 'oversized', False)
+            or data.size > settings.FILE_UPLOAD_MAX_SIZE
+        ):
+            raise forms.ValidationError(
+                'Файл больше %(max)s.',
+                code='file_too_large',
+                params={
+                    'max': filesizeformat(settings.FILE_UPLOAD_MAX_SIZE)
+                },
+            )
+        width, height = self._read_dimensions(data)
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                'Слишком большое разрешение: %(width)sx%(height)s.',
+                code='image_too_large',
+                params={'width': width, 'height': height},
+            )
+        return super().to_python(data)
+
+    def _read_dimensions(self, data):
+        from PIL import Image
+
+        source = (
+            data.temporary_file_path()
+            if hasattr(data, 'temporary_file_path') else data
+        )
+        try:
+            with Image.open(source) as image:
+                return image.size
+        except Exception:
+            raise forms.ValidationError(
+                self.error_messages['invalid_image'], code='invalid_image'
+            )
+        finally:
+            if hasattr(data, 'seek'):
+                data.seek(0)
+
+
+class PostForm(StyledFormMixin, forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': LimitedImageField}
 
 
-class CommentForm(forms.ModelForm):
+class CommentForm(StyledFormMixin, forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
@@ -0,0 +1,47 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import Post
+from posts.utils.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые посты вместе с комментариями в архивные '
+        'таблицы пачками, каждая пачка - в своей транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_POSTS_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, сколько постов будет перенесено.',
+        )
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - datetime.timedelta(
+            days=options['days']
+        )
+        if options['dry_run']:
+            count = Post.objects.filter(pub_date__lt=older_than).count()
+            self.stdout.write(
+                f'Будет перенесено постов старше {older_than:%Y-%m-%d}: '
+                f'{count}'
+            )
+            return
+        count = archive_posts(
+            older_than, options['batch_size'],
+            progress=lambda done: self.stdout.write(f'Перенесено: {done}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, в архиве {count} новых постов.'
+        ))
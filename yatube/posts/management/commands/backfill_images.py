@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.utils.images import backfill_images
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит заглушки и миниатюры для картинок постов, загруженных '
+        'до появления фоновой обработки, в том числе архивных.'
+    )
+
+    def handle(self, *args, **options):
+        count = backfill_images(
+            progress=lambda done: self.stdout.write(f'Обработано: {done}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, обработано постов: {count}.'
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.utils.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ленту популярных постов. Запускается по cron '
+        'или как фоновый процесс с --interval.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Пересчитывать каждые N секунд, не завершая работу.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            count = rebuild_trending()
+            self.stdout.write(
+                f'Ранжировано постов: {count} '
+                f'за {time.monotonic() - started:.2f} с'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.utils.group_stats import rebuild_group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику всех групп с нуля.'
+
+    def handle(self, *args, **options):
+        count = rebuild_group_stats()
+        self.stdout.write(f'Пересчитана статистика групп: {count}')
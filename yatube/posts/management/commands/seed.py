@@ -0,0 +1,66 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts.utils.group_stats import rebuild_group_stats
+from posts.utils.seed import SEED_PASSWORD, generate
+from posts.utils.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу большим набором пользователей, групп, постов, '
+        'комментариев и подписок со скошенными распределениями. '
+        f'Пароль всех созданных пользователей: {SEED_PASSWORD}.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ('users', 10_000),
+            ('groups', 100),
+            ('posts', 200_000),
+            ('comments', 500_000),
+            ('follows', 100_000),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько добавить (по умолчанию {default}).',
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое зерно даёт одинаковые данные.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=(
+                'Число процессов для постов, комментариев и подписок. '
+                'SQLite не допускает параллельной записи, '
+                'используйте больше одного процесса только с PostgreSQL.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        generate(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=self.progress,
+        )
+        self.stdout.write('Пересчёт статистики групп и популярного...')
+        rebuild_group_stats()
+        rebuild_trending()
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+        ))
+
+    def progress(self, stage, done, total):
+        self.stdout.write(f'{stage}: {done}/{total}')
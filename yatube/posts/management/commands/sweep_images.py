@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.utils.images import sweep_images
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые не ссылается ни один пост, '
+        'в том числе архивный.'
+    )
+
+    def handle(self, *args, **options):
+        count = sweep_images(
+            progress=lambda done: self.stdout.write(f'Удалено: {done}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, удалено файлов: {count}.'
+        ))
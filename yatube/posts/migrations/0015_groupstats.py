@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:00
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def populate_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    for group in Group.objects.all():
+        posts = Post.objects.filter(group=group)
+        top_authors = (
+            posts.values('author__username')
+            .annotate(posts_count=Count('id'))
+            .order_by('-posts_count', 'author__username')
+            .values_list('author__username', flat=True)[:5]
+        )
+        GroupStats.objects.create(
+            group=group,
+            **posts.aggregate(
+                post_count=Count('id'), last_post_at=Max('pub_date')
+            ),
+            comment_count=Comment.objects.filter(post__group=group).count(),
+            top_authors=','.join(top_authors),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_trendingpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('last_post_at', models.DateTimeField(blank=True, null=True)),
+                ('top_authors', models.TextField(blank=True, help_text='Имена самых активных авторов группы через запятую')),
+            ],
+        ),
+        migrations.RunPython(
+            populate_group_stats, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_groupstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='data: URI крошечной копии картинки', verbose_name='Размытая превью-заглушка'),
+        ),
+    ]
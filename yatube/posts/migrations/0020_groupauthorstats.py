@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_group_author_stats(apps, schema_editor):
+    GroupAuthorStats = apps.get_model('posts', 'GroupAuthorStats')
+    counts = {}
+    for model_name in ('Post', 'ArchivedPost'):
+        rows = (
+            apps.get_model('posts', model_name).objects
+            .filter(group__isnull=False, is_hidden=False)
+            .values_list('group_id', 'author_id')
+            .annotate(post_count=Count('id'))
+        )
+        for group_id, author_id, post_count in rows:
+            key = (group_id, author_id)
+            counts[key] = counts.get(key, 0) + post_count
+    GroupAuthorStats.objects.bulk_create(
+        GroupAuthorStats(
+            group_id=group_id, author_id=author_id, post_count=post_count
+        )
+        for (group_id, author_id), post_count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0019_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupAuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_stats', to='posts.Group')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupauthorstats',
+            index=models.Index(fields=['group', '-post_count'], name='group_author_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupauthorstats',
+            constraint=models.UniqueConstraint(fields=('group', 'author'), name='unique_group_author_stats'),
+        ),
+        migrations.RunPython(
+            populate_group_author_stats, migrations.RunPython.noop
+        ),
+    ]
@@ -4,12 +4,18 @@ from django.db import models
 User = get_user_model()
 
 
+class VisibleQuerySet(models.QuerySet):
+    def visible(self):
+        """Объекты, не скрытые модераторами."""
+        return self.filter(is_hidden=False)
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста',
     )
-    pub_date = models.DateTimeField(auto_now_add=True)
+    pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -27,11 +33,36 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        blank=True,
+        # release_image ищет посты по имени файла.
+        db_index=True,
+    )
+    image_placeholder = models.TextField(
+        'Размытая превью-заглушка',
+        blank=True,
+        editable=False,
+        help_text='data: URI крошечной копии картинки',
+    )
+    image_thumbnail = models.CharField(
+        'Адрес миниатюры',
+        max_length=255,
+        blank=True,
+        editable=False,
     )
+    is_hidden = models.BooleanField(
+        'Скрыт модератором',
+        default=False,
+    )
+
+    objects = VisibleQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['group', '-pub_date'], name='post_group_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -42,6 +73,12 @@ class Group(models.Model):
     slug = models.SlugField(unique=True)
     description = models.TextField()
 
+    class Meta:
+        # Каталог групп и API листаются курсором по (title, pk).
+        indexes = [
+            models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -61,7 +98,13 @@ class Comment(models.Model):
         verbose_name='Текст комментария',
         help_text='Текст нового комментария',
     )
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    is_hidden = models.BooleanField(
+        'Скрыт модератором',
+        default=False,
+    )
+
+    objects = VisibleQuerySet.as_manager()
 
 
 class Follow(models.Model):
@@ -79,3 +122,211 @@ class Follow(models.Model):
         verbose_name='Автор',
         help_text='Пользователь, на которого подписываются',
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        ]
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='trending',
+        on_delete=models.CASCADE,
+    )
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f'{self.rank}: {self.post}'
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+    post_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(blank=True, null=True)
+    top_authors = models.TextField(
+        blank=True,
+        help_text='Имена самых активных авторов группы через запятую',
+    )
+
+    def __str__(self):
+        return f'Статистика {self.group}'
+
+    @property
+    def top_author_names(self):
+        return self.top_authors.split(',') if self.top_authors else []
+
+
+class GroupAuthorStats(models.Model):
+    """Число постов автора в группе: по нему выбираются top_authors."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('group', 'author'),
+                name='unique_group_author_stats',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['group', '-post_count'],
+                name='group_author_top_idx',
+            ),
+        ]
+
+
+class ModerationJob(models.Model):
+    """Фоновая обработка множества постов или комментариев из админки."""
+    DELETE = 'delete'
+    HIDE = 'hide'
+    SHOW = 'show'
+    MOVE = 'move'
+    ACTIONS = [
+        (DELETE, 'Удалить'),
+        (HIDE, 'Скрыть'),
+        (SHOW, 'Показать'),
+        (MOVE, 'Перенести в группу'),
+    ]
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    model = models.CharField('Модель', max_length=100)
+    action = models.CharField('Действие', max_length=10, choices=ACTIONS)
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Группа',
+    )
+    created_by = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Запустил',
+    )
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING
+    )
+    total = models.PositiveIntegerField('Всего', null=True, blank=True)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'задача модерации'
+        verbose_name_plural = 'задачи модерации'
+
+    def __str__(self):
+        return f'#{self.pk} {self.get_action_display()} {self.model}'
+
+    @property
+    def progress(self) -> int:
+        """Процент обработанных объектов."""
+        if not self.total:
+            return 100 if self.status == self.DONE else 0
+        return min(100, self.processed * 100 // self.total)
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из Post командой archive_posts.
+
+    id совпадает с id исходного поста, поэтому ссылки продолжают
+    работать. Архивные посты только читаются.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField(db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа',
+    )
+    image = models.ImageField(
+        'Картинка', upload_to='posts/', blank=True, db_index=True
+    )
+    image_placeholder = models.TextField(blank=True, editable=False)
+    image_thumbnail = models.CharField(
+        max_length=255, blank=True, editable=False
+    )
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = VisibleQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'архивный пост'
+        verbose_name_plural = 'архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='archived_comments',
+        on_delete=models.CASCADE,
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField()
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+
+    objects = VisibleQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created']
@@ -0,0 +1,144 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.background import run_in_background
+from core.events import event_bus
+
+from .models import ArchivedPost, Comment, Follow, Group, Post
+from .utils import follow_graph, group_stats
+from .utils.group_directory import invalidate_group_directory
+from .utils.images import process_post_image, release_image
+from .utils.moderation import in_batch_delete
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    invalidate_group_directory()
+    if created:
+        group_stats.refresh_group_stats(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_group_directory_on_delete(sender, instance, **kwargs):
+    invalidate_group_directory()
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, **kwargs):
+    instance._previous_group_id, instance._previous_image = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('group_id', 'image')
+        .first()
+        if instance.pk else None
+    ) or (None, '')
+    if (
+        instance.image.name != instance._previous_image
+        and not getattr(instance, '_image_processed', False)
+    ):
+        # Заглушка и миниатюра старой картинки; новые посчитает
+        # фоновая обработка.
+        instance.image_placeholder = instance.image_thumbnail = ''
+
+
+@receiver(post_save, sender=Post)
+def process_uploaded_image(sender, instance, **kwargs):
+    previous_image = getattr(instance, '_previous_image', '')
+    if instance.image.name == previous_image:
+        return
+    if previous_image:
+        transaction.on_commit(lambda: release_image(previous_image))
+    if instance.image and not getattr(instance, '_image_processed', False):
+        run_in_background(process_post_image, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_deleted_image(sender, instance, **kwargs):
+    if instance.image and not in_batch_delete():
+        name = instance.image.name
+        transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats_on_post_save(sender, instance, created, **kwargs):
+    if created:
+        group_stats.post_added(instance)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        group_stats.post_moved(instance, previous_group_id)
+
+
+@receiver(post_delete, sender=Post)
+def update_group_stats_on_post_delete(sender, instance, **kwargs):
+    if not in_batch_delete():
+        group_stats.post_removed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def update_group_stats_on_comment_save(sender, instance, created, **kwargs):
+    # Скрытые комментарии и комментарии скрытых постов не учитываются.
+    if created and not instance.is_hidden and not instance.post.is_hidden:
+        group_stats.comment_count_changed(instance.post.group_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def update_group_stats_on_comment_delete(sender, instance, **kwargs):
+    # Скрытые комментарии и комментарии скрытых постов не учитывались.
+    if instance.is_hidden or in_batch_delete():
+        return
+    group_id, post_hidden = (
+        Post.objects.filter(pk=instance.post_id)
+        .values_list('group_id', 'is_hidden')
+        .first()
+    ) or (None, True)
+    if not post_hidden:
+        group_stats.comment_count_changed(group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if not created:
+        return
+    channels = ['posts:index', f'posts:author:{instance.author_id}']
+    if instance.group_id is not None:
+        channels.append(f'posts:group:{instance.group_id}')
+    data = {'id': instance.pk}
+
+    def publish():
+        for channel in channels:
+            event_bus.publish(channel, 'post', data)
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+    data = {
+        'id': instance.pk,
+        'author': instance.author.username,
+        'text': instance.text,
+        'created': instance.created,
+    }
+    transaction.on_commit(lambda: event_bus.publish(
+        f'comments:post:{instance.post_id}', 'comment', data
+    ))
+
+
+@receiver(pre_save, sender=Follow)
+def invalidate_previous_follow(sender, instance, **kwargs):
+    # Подписку правят в админке: сбрасываем кэши прежних сторон.
+    if instance.pk:
+        previous = Follow.objects.filter(pk=instance.pk).first()
+        if previous is not None:
+            follow_graph.invalidate_follow(previous)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    # Подписки меняются не только через follow_graph: админка, каскадное
+    # удаление пользователей.
+    follow_graph.invalidate_follow(instance)
@@ -0,0 +1,35 @@
+"""Общие наборы данных для тестов.
+
+Наборы вставляются через bulk_create - по одному запросу на модель
+вместо запроса на каждый объект - в setUpTestData классов, которым
+они нужны. Строки, записанные в БД сразу на всю сессию, здесь не
+годятся: TestCase изолирует классы откатом транзакции, и такие строки
+видел бы каждый класс (а тесты рассчитывают, например, на post_id=1).
+
+bulk_create не вызывает сигналы, поэтому статистика групп после
+вставки пересчитывается явно.
+"""
+from types import SimpleNamespace
+
+from ..models import Group, Post, User
+from ..utils.group_stats import refresh_group_stats
+
+
+def load_group_posts(username='auth', slug='testslug', count=13):
+    """Создаёт автора, группу и count его постов в этой группе.
+
+    Возвращает объект с полями author, group и posts (по возрастанию pk).
+    """
+    author = User.objects.create_user(username=username)
+    group = Group.objects.create(
+        title='Тестовая группа',
+        slug=slug,
+        description='Тестовое описание',
+    )
+    Post.objects.bulk_create(
+        Post(author=author, group=group, text=f'Тестовый пост #{i}')
+        for i in range(count)
+    )
+    refresh_group_stats(group.pk)
+    posts = list(Post.objects.filter(group=group).order_by('pk'))
+    return SimpleNamespace(author=author, group=group, posts=posts)
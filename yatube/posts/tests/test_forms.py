@@ -1,24 +1,26 @@
-import shutil
-import tempfile
+import io
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase, override_settings
-from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from PIL import Image
 
-from ..models import Group, Post
+from core.testing import TempMediaRootMixin
 
-User = get_user_model()
+from ..models import ArchivedPost, Group, Post
+from ..utils.archive import archive_batch
+from ..utils.images import (
+    backfill_images, process_post_image, release_image, sweep_images,
+)
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostFormsTests(TestCase):
+class PostFormsTests(TempMediaRootMixin, TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -31,11 +33,6 @@ class PostFormsTests(TestCase):
             description='Тестовое описание # 2',
         )
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def setUp(self):
         self.authorized_client = Client()
         self.authorized_client.force_login(PostFormsTests.user)
@@ -121,3 +118,164 @@ class PostFormsTests(TestCase):
             'Тестовый комментарий',
         )
         Post.objects.get(id=1).delete()
+
+
+class ImageUploadTests(TempMediaRootMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ImageUploadTests.user)
+
+    @staticmethod
+    def make_jpeg(size, exif=True):
+        buffer = io.BytesIO()
+        image = Image.new('RGB', size, color='red')
+        exif_data = Image.Exif()
+        if exif:
+            exif_data[0x010F] = 'Camera'
+        image.save(buffer, format='JPEG', exif=exif_data)
+        return SimpleUploadedFile(
+            name='photo.jpg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg',
+        )
+
+    def post_image(self, uploaded):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': uploaded},
+        )
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=100)
+    def test_oversized_upload_is_rejected(self):
+        """Файл больше FILE_UPLOAD_MAX_SIZE отклоняется формой."""
+        response = self.post_image(self.make_jpeg((50, 50)))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 100\xa0байт.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_huge_resolution_is_rejected(self):
+        """Картинка с огромным разрешением отклоняется по заголовку."""
+        response = self.post_image(self.make_jpeg((50, 50)))
+        self.assertFormError(
+            response, 'form', 'image', 'Слишком большое разрешение: 50x50.'
+        )
+
+    @override_settings(IMAGE_MAX_DIMENSION=20)
+    def test_processing_strips_exif_and_downscales(self):
+        """Фоновая обработка удаляет EXIF и уменьшает картинку."""
+        post = Post.objects.create(
+            author=ImageUploadTests.user,
+            text='Пост',
+            image=self.make_jpeg((80, 40)),
+        )
+        self.assertTrue(process_post_image(post.pk))
+        post.refresh_from_db()
+        self.assertRegex(
+            post.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]+\.jpg$'
+        )
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (20, 10))
+            self.assertFalse(image.getexif())
+        self.assertTrue(post.image_thumbnail)
+        self.assertFalse(process_post_image(post.pk))
+
+    @override_settings(IMAGE_RELEASE_MIN_AGE=0)
+    def test_identical_uploads_share_one_file(self):
+        """Одинаковые картинки хранятся одним файлом до последней ссылки."""
+        posts = [
+            Post.objects.create(
+                author=ImageUploadTests.user,
+                text=f'Пост {i}',
+                image=self.make_jpeg((10, 10), exif=False),
+            )
+            for i in range(2)
+        ]
+        name = posts[0].image.name
+        self.assertEqual(posts[1].image.name, name)
+        storage = posts[0].image.storage
+        posts[0].delete()
+        self.assertFalse(release_image(name))
+        self.assertTrue(storage.exists(name))
+        posts[1].delete()
+        self.assertTrue(release_image(name))
+        self.assertFalse(storage.exists(name))
+
+    def test_recently_uploaded_file_is_left_for_sweep(self):
+        """Свежий файл может ждать загрузку, его удаляет sweep_images."""
+        post = Post.objects.create(
+            author=ImageUploadTests.user,
+            text='Пост',
+            image=self.make_jpeg((10, 10), exif=False),
+        )
+        name, storage = post.image.name, post.image.storage
+        post.delete()
+        self.assertFalse(release_image(name))
+        self.assertTrue(storage.exists(name))
+        with override_settings(IMAGE_RELEASE_MIN_AGE=0):
+            self.assertTrue(sweep_images())
+        self.assertFalse(storage.exists(name))
+
+    @override_settings(IMAGE_RELEASE_MIN_AGE=0)
+    def test_archived_post_keeps_image(self):
+        """Файл архивного поста не удаляется, пока архивная строка жива."""
+        post = Post.objects.create(
+            author=ImageUploadTests.user,
+            text='Пост',
+            image=self.make_jpeg((10, 10), exif=False),
+        )
+        name, storage = post.image.name, post.image.storage
+        archive_batch([post.pk])
+        sweep_images()
+        self.assertTrue(storage.exists(name))
+        ArchivedPost.objects.get().delete()
+        sweep_images()
+        self.assertFalse(storage.exists(name))
+
+    def test_placeholder_and_lazy_loading(self):
+        """Заглушка строится при обработке, картинки ниже первой - lazy."""
+        posts = [
+            Post.objects.create(
+                author=ImageUploadTests.user,
+                text=f'Пост {i}',
+                image=self.make_jpeg((40 + i, 20), exif=False),
+            )
+            for i in range(2)
+        ]
+        for post in posts:
+            process_post_image(post.pk)
+            post.refresh_from_db()
+            self.assertTrue(
+                post.image_placeholder.startswith('data:image/jpeg;base64,')
+            )
+        cache.clear()
+        content = self.authorized_client.get(
+            reverse('posts:index')
+        ).content.decode()
+        self.assertEqual(content.count('loading="lazy"'), 1)
+        self.assertEqual(content.count('fetchpriority="high"'), 1)
+        self.assertIn(posts[0].image_placeholder, content)
+
+    def test_backfill_processes_hot_and_archived_posts(self):
+        """backfill_images догоняет посты без заглушки, включая архив."""
+        posts = [
+            Post.objects.create(
+                author=ImageUploadTests.user,
+                text=f'Пост {i}',
+                image=self.make_jpeg((30 + i, 20), exif=False),
+            )
+            for i in range(2)
+        ]
+        archive_batch([posts[1].pk])
+        self.assertEqual(backfill_images(), 2)
+        for post in (
+            Post.objects.get(pk=posts[0].pk), ArchivedPost.objects.get()
+        ):
+            self.assertTrue(post.image_placeholder)
+            self.assertTrue(post.image_thumbnail)
+        self.assertEqual(backfill_images(), 0)
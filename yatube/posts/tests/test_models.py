@@ -1,15 +1,19 @@
+import datetime as dt
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, GroupStats, Post
+from ..utils import group_stats
 
 User = get_user_model()
 
 
 class PostModelTest(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -42,3 +46,195 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     getattr(post._meta.get_field('text'), value), expected)
+
+
+class GroupStatsModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.user_2 = User.objects.create_user(username='auth_2')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='testslug',
+            description='Тестовое описание',
+        )
+        cls.group_2 = Group.objects.create(
+            title='Тестовая группа # 2',
+            slug='testslug2',
+            description='Тестовое описание # 2',
+        )
+
+    def test_stats_follow_posts_and_comments(self):
+        """Статистика группы обновляется при создании постов и комментариев."""
+        Post.objects.create(
+            author=GroupStatsModelTest.user_2,
+            text='Пост 1',
+            group=GroupStatsModelTest.group,
+        )
+        for i in range(2):
+            post = Post.objects.create(
+                author=GroupStatsModelTest.user,
+                text=f'Пост {i + 2}',
+                group=GroupStatsModelTest.group,
+            )
+        Comment.objects.create(
+            post=post, author=GroupStatsModelTest.user, text='Комментарий'
+        )
+        stats = GroupStats.objects.get(group=GroupStatsModelTest.group)
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(stats.comment_count, 1)
+        self.assertEqual(stats.last_post_at, post.pub_date)
+        self.assertEqual(stats.top_author_names, ['auth', 'auth_2'])
+
+    def test_post_added_cost_does_not_grow_with_group(self):
+        """Учёт нового поста не перебирает историю группы."""
+        group = GroupStatsModelTest.group
+        post = Post.objects.create(
+            author=GroupStatsModelTest.user, group=group, text='Пост'
+        )
+        with self.assertNumQueries(3):
+            group_stats.post_added(post)
+        for author in (GroupStatsModelTest.user, GroupStatsModelTest.user_2):
+            for i in range(5):
+                Post.objects.create(author=author, group=group, text=str(i))
+        with self.assertNumQueries(3):
+            group_stats.post_added(post)
+        group_stats.refresh_group_stats(group.pk)
+        self.assertEqual(
+            GroupStats.objects.get(group=group).top_author_names,
+            ['auth', 'auth_2'],
+        )
+
+    def test_post_removed_is_incremental(self):
+        """Удаление поста сдвигает счётчики, не пересчитывая группу."""
+        group = GroupStatsModelTest.group
+        older, latest = [
+            Post.objects.create(
+                author=GroupStatsModelTest.user, group=group, text=str(i)
+            )
+            for i in range(2)
+        ]
+        for i in range(5):
+            Post.objects.create(
+                author=GroupStatsModelTest.user_2, group=group, text=str(i)
+            )
+        Post.objects.filter(pk=latest.pk).update(
+            pub_date=latest.pub_date + dt.timedelta(days=1)
+        )
+        latest.refresh_from_db()
+        group_stats.refresh_group_stats(group.pk)
+        # Не самый свежий пост: автор, top_authors и сами счётчики.
+        with self.assertNumQueries(3):
+            group_stats.post_removed(older)
+        group_stats.refresh_group_stats(group.pk)
+        older.delete()
+        latest.delete()
+        stats = GroupStats.objects.get(group=group)
+        self.assertEqual(stats.post_count, 5)
+        self.assertEqual(
+            stats.last_post_at,
+            Post.objects.filter(group=group).latest('pub_date').pub_date,
+        )
+        self.assertEqual(stats.top_author_names, ['auth_2'])
+
+    def test_hidden_post_is_not_counted(self):
+        """Пост, созданный скрытым, не попадает в статистику."""
+        Post.objects.create(
+            author=GroupStatsModelTest.user,
+            text='Скрытый пост',
+            group=GroupStatsModelTest.group,
+            is_hidden=True,
+        )
+        stats = GroupStats.objects.get(group=GroupStatsModelTest.group)
+        self.assertEqual(stats.post_count, 0)
+        self.assertEqual(stats.top_author_names, [])
+
+    def test_deleting_hidden_comment_keeps_count(self):
+        """Удаление скрытого комментария не уменьшает счётчик."""
+        post = Post.objects.create(
+            author=GroupStatsModelTest.user,
+            text='Пост',
+            group=GroupStatsModelTest.group,
+        )
+        visible, hidden = [
+            Comment.objects.create(
+                post=post, author=GroupStatsModelTest.user, text='Текст'
+            )
+            for _ in range(2)
+        ]
+        Comment.objects.filter(pk=hidden.pk).update(is_hidden=True)
+        group_stats.refresh_group_stats(GroupStatsModelTest.group.pk)
+        Comment.objects.get(pk=hidden.pk).delete()
+        stats = GroupStats.objects.get(group=GroupStatsModelTest.group)
+        self.assertEqual(stats.comment_count, 1)
+
+        Post.objects.filter(pk=post.pk).update(is_hidden=True)
+        group_stats.refresh_group_stats(GroupStatsModelTest.group.pk)
+        visible.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.comment_count, 0)
+
+    def test_hidden_comment_is_not_counted(self):
+        """Скрытый комментарий и комментарий скрытого поста не учитываются."""
+        post, hidden_post = [
+            Post.objects.create(
+                author=GroupStatsModelTest.user,
+                text='Пост',
+                group=GroupStatsModelTest.group,
+                is_hidden=is_hidden,
+            )
+            for is_hidden in (False, True)
+        ]
+        Comment.objects.create(
+            post=post, author=GroupStatsModelTest.user, text='Текст',
+            is_hidden=True,
+        )
+        Comment.objects.create(
+            post=hidden_post, author=GroupStatsModelTest.user, text='Текст'
+        )
+        stats = GroupStats.objects.get(group=GroupStatsModelTest.group)
+        self.assertEqual(stats.comment_count, 0)
+
+    def test_stats_follow_group_change_and_delete(self):
+        """Перенос и удаление поста пересчитывают статистику групп."""
+        post = Post.objects.create(
+            author=GroupStatsModelTest.user,
+            text='Пост',
+            group=GroupStatsModelTest.group,
+        )
+        Comment.objects.create(
+            post=post, author=GroupStatsModelTest.user, text='Комментарий'
+        )
+        post.group = GroupStatsModelTest.group_2
+        post.save()
+        stats = GroupStats.objects.get(group=GroupStatsModelTest.group)
+        stats_2 = GroupStats.objects.get(group=GroupStatsModelTest.group_2)
+        self.assertEqual((stats.post_count, stats.comment_count), (0, 0))
+        self.assertEqual((stats_2.post_count, stats_2.comment_count), (1, 1))
+        post.delete()
+        stats_2.refresh_from_db()
+        self.assertEqual(
+            (stats_2.post_count, stats_2.comment_count, stats_2.top_authors),
+            (0, 0, ''),
+        )
+
+
+class SeedCommandTest(TestCase):
+    def test_seed_creates_requested_data(self):
+        """seed создаёт данные с датами в прошлом и пересчитывает группы."""
+        call_command(
+            'seed', users=20, groups=3, posts=60, comments=90, follows=30,
+            batch_size=25, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 90)
+        self.assertTrue(0 < Follow.objects.count() <= 30)
+        self.assertGreater(
+            Post.objects.dates('pub_date', 'month').count(), 1
+        )
+        self.assertEqual(
+            sum(GroupStats.objects.values_list('post_count', flat=True)),
+            Post.objects.exclude(group=None).count(),
+        )
@@ -27,8 +27,7 @@ class StaticURLTests(TestCase):
     }
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.user_2 = User.objects.create_user(username='auth_2')
         cls.group = Group.objects.create(
@@ -1,23 +1,35 @@
-import shutil
-import tempfile
+import datetime as dt
+from unittest import mock
 
 from django import forms
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
-from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from http import HTTPStatus
 
-from ..models import Group, Post
+from core.testing import TempMediaRootMixin
 
-User = get_user_model()
+from ..models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                      ModerationJob, Post, TrendingPost)
+from ..utils.archive import archive_posts
+from ..utils.follow_graph import (FOLLOWING_IDS_KEY, bulk_follow,
+                                  get_follower_count, get_following_count,
+                                  get_following_ids, invalidate_following_ids)
+from ..utils.group_stats import refresh_group_stats
+from ..utils.moderation import run_job, start_job
+from ..utils.paginator import encode_cursor
+from ..utils.trending import rebuild_trending
+from .fixtures import load_group_posts
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostPagesTests(TestCase):
+class PostPagesTests(TempMediaRootMixin, TestCase):
     pages_names_templates = {
         reverse('posts:index'): 'posts/index.html',
         reverse('posts:group_list', kwargs={'slug': 'testslug'}): (
@@ -36,8 +48,7 @@ class PostPagesTests(TestCase):
     }
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -69,11 +80,6 @@ class PostPagesTests(TestCase):
             image=uploaded,
         )
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def setUp(self):
         self.authorized_client = Client()
         self.authorized_client.force_login(PostPagesTests.user)
@@ -173,20 +179,9 @@ class PaginatorTestView(TestCase):
     }
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
-        cls.user = User.objects.create_user(username='auth')
-        cls.group = Group.objects.create(
-            title='Тестовая группа',
-            slug='testslug',
-            description='Тестовое описание',
-        )
-        for i in range(13):
-            Post.objects.create(
-                author=cls.user,
-                text=f'Тестовый пост #{i}',
-                group=cls.group,
-            )
+    def setUpTestData(cls):
+        fixture = load_group_posts(count=13)
+        cls.user, cls.group = fixture.author, fixture.group
 
     def setUp(self):
         self.authorized_client = Client()
@@ -199,9 +194,438 @@ class PaginatorTestView(TestCase):
                 response = self.authorized_client.get(reverse_name)
                 self.assertEqual(len(response.context['page_obj']), 10)
 
+    def test_group_stats_count_fixture_posts(self):
+        """Статистика группы учитывает посты, вставленные bulk_create."""
+        self.assertEqual(PaginatorTestView.group.stats.post_count, 13)
+
     def test_second_pages_contain_three_records(self):
         """Первые страницы из pages_names_templates содержат 3 постов."""
         for reverse_name in self.pages_names:
             with self.subTest(reverse_name=reverse_name):
                 response = self.authorized_client.get(reverse_name + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class FollowGraphTestView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowGraphTestView.user)
+
+    def test_following_ids_are_cached_per_user(self):
+        """Подписки пользователя загружаются одним запросом и кэшируются."""
+        Follow.objects.create(
+            user=FollowGraphTestView.user, author=FollowGraphTestView.author
+        )
+        with self.assertNumQueries(1):
+            following_ids = get_following_ids(FollowGraphTestView.user)
+        with self.assertNumQueries(0):
+            get_following_ids(FollowGraphTestView.user)
+        self.assertEqual(following_ids, {FollowGraphTestView.author.pk})
+
+    def test_profile_shows_follow_state(self):
+        """В контекст profile передаётся состояние подписки."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['following'])
+        Follow.objects.create(
+            user=FollowGraphTestView.user, author=FollowGraphTestView.author
+        )
+        invalidate_following_ids(FollowGraphTestView.user)
+        response = self.authorized_client.get(url)
+        self.assertTrue(response.context['following'])
+        self.assertContains(response, 'Отписаться')
+
+    def test_unfollow_invalidates_following_ids(self):
+        """После отписки кэш подписок сбрасывается."""
+        Follow.objects.create(
+            user=FollowGraphTestView.user, author=FollowGraphTestView.author
+        )
+        get_following_ids(FollowGraphTestView.user)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(get_following_ids(FollowGraphTestView.user), set())
+
+    def test_direct_follow_changes_invalidate_caches(self):
+        """Правка подписки и каскадное удаление тоже сбрасывают кэши."""
+        user = FollowGraphTestView.user
+        author = FollowGraphTestView.author
+        other = User.objects.create_user(username='other')
+        follow = Follow.objects.create(user=user, author=author)
+        self.assertEqual(get_follower_count(author), 1)
+        follow.author = other
+        follow.save()
+        self.assertEqual(get_following_ids(user), {other.pk})
+        self.assertEqual(get_follower_count(author), 0)
+        self.assertEqual(get_follower_count(other), 1)
+        other.delete()
+        self.assertEqual(get_following_ids(user), set())
+        self.assertEqual(get_following_count(user), 0)
+
+    def test_follow_is_idempotent(self):
+        """Повторная подписка не создаёт дубликатов, на себя - запрещена."""
+        url = reverse('posts:profile_follow', kwargs={'username': 'author'})
+        self.authorized_client.get(url)
+        self.authorized_client.get(url)
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'follower'})
+        )
+        self.assertEqual(
+            Follow.objects.filter(user=FollowGraphTestView.user).count(), 1
+        )
+        self.assertEqual(get_follower_count(FollowGraphTestView.author), 1)
+        self.assertEqual(get_following_count(FollowGraphTestView.user), 1)
+        # Счётчик считается COUNT(*), а не загрузкой всех подписок.
+        self.assertIsNone(cache.get(
+            FOLLOWING_IDS_KEY.format(user_id=FollowGraphTestView.user.pk)
+        ))
+
+    def test_unfollow_unknown_user_returns_404(self):
+        """Отписка от несуществующего пользователя возвращает 404."""
+        response = self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'nobody'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_bulk_follow_and_unfollow(self):
+        """Массовая подписка и отписка выполняются одним запросом."""
+        usernames = [f'bulk_author_{i}' for i in range(5)]
+        User.objects.bulk_create(
+            User(username=username) for username in usernames
+        )
+        author_ids = User.objects.filter(
+            username__in=usernames
+        ).values_list('pk', flat=True)
+        self.authorized_client.post(
+            reverse('posts:profile_follow_bulk'),
+            {'username': usernames + ['follower']},
+        )
+        self.assertEqual(
+            len(get_following_ids(FollowGraphTestView.user)), 5
+        )
+        self.assertEqual(
+            bulk_follow(FollowGraphTestView.user, author_ids), 0
+        )
+        self.authorized_client.post(
+            reverse('posts:profile_follow_bulk'),
+            {'username': usernames, 'action': 'unfollow'},
+        )
+        self.assertEqual(get_following_ids(FollowGraphTestView.user), set())
+
+
+class TrendingTestView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Тестовый пост #{i}')
+            for i in range(13)
+        ]
+        for _ in range(3):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.user, text='Комментарий'
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_rebuild_trending_ranks_commented_posts_first(self):
+        """Пост с комментариями поднимается в начало ленты популярного."""
+        self.assertEqual(rebuild_trending(), 13)
+        first = TrendingPost.objects.first()
+        self.assertEqual(first.post, TrendingTestView.posts[0])
+        self.assertEqual(first.rank, 1)
+
+    def test_trending_page_uses_cursor_pagination(self):
+        """Лента популярного листается курсором без повторов."""
+        rebuild_trending()
+        response = self.guest_client.get(reverse('posts:trending'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertTrue(page_obj.has_next())
+        response = self.guest_client.get(
+            reverse('posts:trending'), {'cursor': page_obj.next_cursor}
+        )
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        ranks = [item.rank for item in list(page_obj) + list(second_page)]
+        self.assertEqual(ranks, list(range(1, 14)))
+
+
+class GroupIndexTestView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        for i in range(3):
+            Group.objects.create(
+                title=f'Тестовая группа # {i}',
+                slug=f'testslug{i}',
+                description='Тестовое описание',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_group_index_shows_post_counts(self):
+        """Список групп содержит число постов каждой группы."""
+        group = Group.objects.get(slug='testslug1')
+        Post.objects.create(
+            author=GroupIndexTestView.user, text='Пост', group=group
+        )
+        Post.objects.create(
+            author=GroupIndexTestView.user, text='Скрытый', group=group,
+            is_hidden=True,
+        )
+        response = self.guest_client.get(reverse('posts:group_index'))
+        posts_counts = {
+            group.slug: group.posts_count
+            for group in response.context['page_obj']
+        }
+        self.assertEqual(
+            posts_counts, {'testslug0': 0, 'testslug1': 1, 'testslug2': 0}
+        )
+
+    def test_tampered_cursor_shows_first_page(self):
+        response = self.guest_client.get(
+            reverse('posts:group_index'),
+            {'cursor': encode_cursor([['title'], 'pk'])},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_group_index_reads_counts_from_group_stats(self):
+        """Страница групп берётся из кэша, числа постов - из GroupStats."""
+        url = reverse('posts:group_index')
+        self.guest_client.get(url)
+        with self.assertNumQueries(1):
+            self.guest_client.get(url)
+        Post.objects.create(
+            author=GroupIndexTestView.user,
+            text='Пост',
+            group=Group.objects.get(slug='testslug0'),
+        )
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['page_obj'][0].posts_count, 1)
+
+
+class AdminChangelistTestView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.groups = Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'group-{number}')
+            for number in range(3)
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списков не зависит от числа строк."""
+        urls = [
+            reverse(f'admin:posts_{model}_changelist')
+            for model in ('post', 'comment', 'follow')
+        ]
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.admin, group=group)
+            for group in self.groups
+        )
+        few = [self.count_queries(url) for url in urls]
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.admin, group=self.groups[0])
+            for _ in range(30)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.admin, text='Комментарий')
+            for post in Post.objects.all()
+        )
+        self.assertEqual([self.count_queries(url) for url in urls], few)
+
+
+@override_settings(MODERATION_BATCH_SIZE=2)
+class ModerationJobTestView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.target = Group.objects.create(title='Другая', slug='other')
+        Post.objects.bulk_create(
+            Post(text=f'Спам {number}', author=cls.admin, group=cls.group)
+            for number in range(5)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def run_job(self, queryset, action, group=None):
+        job = start_job(queryset, action, self.admin, group)
+        run_job(job.pk, queryset)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertEqual((job.processed, job.total), (5, 5))
+        return job
+
+    def test_hide_and_show(self):
+        """Скрытые посты пропадают из ленты и со страницы поста."""
+        post = Post.objects.first()
+        self.client.get(reverse('posts:post_detail', args=[post.pk]))
+        self.run_job(Post.objects.all(), ModerationJob.HIDE)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).stats.post_count, 0
+        )
+
+        self.run_job(Post.objects.all(), ModerationJob.SHOW)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+    def test_move_and_delete(self):
+        self.run_job(Post.objects.all(), ModerationJob.MOVE, self.target)
+        self.assertEqual(self.target.posts.count(), 5)
+        self.assertEqual(
+            Group.objects.get(pk=self.target.pk).stats.post_count, 5
+        )
+        self.run_job(Post.objects.all(), ModerationJob.DELETE)
+        self.assertFalse(Post.objects.exists())
+
+    def test_delete_refreshes_each_group_once(self):
+        """Удаление пачкой пересчитывает статистику группы один раз."""
+        with mock.patch(
+            'posts.utils.moderation.group_stats.refresh_group_stats',
+            wraps=refresh_group_stats,
+        ) as refresh:
+            self.run_job(Post.objects.all(), ModerationJob.DELETE)
+        refresh.assert_called_once_with(self.group.pk)
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).stats.post_count, 0
+        )
+
+    def test_admin_action_creates_job(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'background_move',
+                'select_across': '1',
+                'index': '0',
+                'group': self.target.pk,
+                '_selected_action': [Post.objects.first().pk],
+            },
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        job = ModerationJob.objects.get()
+        self.assertEqual(
+            (job.action, job.group, job.model),
+            (ModerationJob.MOVE, self.target, 'posts.post'),
+        )
+
+
+class ArchiveTestView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author, group=cls.group)
+            for number in range(12)
+        )
+        cls.cutoff = timezone.now() - dt.timedelta(days=30)
+        old_ids = list(
+            Post.objects.order_by('pk').values_list('pk', flat=True)[:7]
+        )
+        for days, post_id in enumerate(old_ids, start=60):
+            Post.objects.filter(pk=post_id).update(
+                pub_date=timezone.now() - dt.timedelta(days=days)
+            )
+        cls.old_post = Post.objects.get(pk=old_ids[0])
+        Comment.objects.create(
+            post=cls.old_post, author=cls.author, text='Старый комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_archive_moves_old_posts(self):
+        refresh_group_stats(self.group.pk)
+        self.assertEqual(archive_posts(self.cutoff, batch_size=2), 7)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(ArchivedPost.objects.count(), 7)
+        self.assertEqual(
+            ArchivedComment.objects.get().post_id, self.old_post.pk
+        )
+        refresh_group_stats(self.group.pk)
+        stats = Group.objects.get(pk=self.group.pk).stats
+        self.assertEqual((stats.post_count, stats.comment_count), (12, 1))
+        page_obj = self.client.get(
+            reverse('posts:group_index')
+        ).context['page_obj']
+        self.assertEqual(page_obj[0].posts_count, 12)
+
+    def test_profile_and_detail_read_archive(self):
+        """Профиль продолжается архивом, пост открывается из архива."""
+        archive_posts(self.cutoff, batch_size=5)
+        url = reverse('posts:profile', args=[self.author.username])
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(url + '?page=2').context['page_obj']
+        self.assertEqual(first.paginator.count, 12)
+        dates = [post.pub_date for post in [*first, *second]]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(len(second), 2)
+
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old_post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Старый комментарий')
+        self.assertEqual(response.context['author_posts_count'], 12)
+        response = self.client.get(
+            reverse('api:post_detail', args=[self.old_post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['comments_count'], 1)
+
+    def test_profile_merges_hot_posts_older_than_archive(self):
+        """Горячий пост старше архивных встаёт в профиле на своё место."""
+        archive_posts(self.cutoff, batch_size=5)
+        straggler = Post.objects.create(
+            text='Задним числом', author=self.author
+        )
+        Post.objects.filter(pk=straggler.pk).update(
+            pub_date=timezone.now() - dt.timedelta(days=62, hours=12)
+        )
+        url = reverse('posts:profile', args=[self.author.username])
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(url + '?page=2').context['page_obj']
+        self.assertEqual(first.paginator.count, 13)
+        posts = [*first, *second]
+        dates = [post.pub_date for post in posts]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(posts[8].pk, straggler.pk)
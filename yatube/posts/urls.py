@@ -6,6 +6,8 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -16,7 +18,18 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path('stream/', views.post_stream, name='post_stream'),
+    path(
+        'posts/<int:post_id>/comments/stream/',
+        views.comment_stream,
+        name='comment_stream'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'follow/bulk/',
+        views.profile_follow_bulk,
+        name='profile_follow_bulk'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
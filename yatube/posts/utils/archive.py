@@ -0,0 +1,135 @@
+"""Архив старых постов.
+
+`manage.py archive_posts` пачками переносит посты старше
+ARCHIVE_POSTS_AFTER_DAYS вместе с комментариями в ArchivedPost и
+ArchivedComment. Горячая таблица Post остаётся небольшой, и запросы
+лент и её индексы больше не растут вместе со всей историей сайта.
+
+Лента, группы и подписки показывают только горячие посты. Профиль
+автора продолжается архивом через ArchiveChain, а страница поста
+и api/posts/<id>/ ищут пост в архиве, если его нет в Post.
+"""
+import heapq
+import itertools
+
+from django.db import transaction
+from django.utils.functional import cached_property
+
+from core import object_cache
+
+from ..models import (ArchivedComment, ArchivedPost, Comment, Post,
+                      TrendingPost)
+from .moderation import pk_batches
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    'image_placeholder', 'image_thumbnail', 'is_hidden',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created', 'is_hidden')
+
+
+class ArchiveChain:
+    """Горячие посты, за которыми следуют архивные.
+
+    archive_posts переносит посты по дате, поэтому обычно все архивные
+    посты старше горячих, и страница склеивается из двух срезов: первые
+    страницы целиком из горячей таблицы. Горячие посты не новее самого
+    свежего архивного (например, созданные с явной датой уже после
+    архивации) сливаются с архивом по дате: это дороже, но порядок
+    не нарушается. Объект понимает count() и срезы, как нужно Paginator.
+    """
+
+    def __init__(self, hot, archived):
+        self.hot = hot.order_by('-pub_date', '-pk')
+        self.archived = archived.order_by('-pub_date', '-pk')
+
+    @cached_property
+    def boundary(self):
+        """Дата самого свежего архивного поста."""
+        return self.archived.values_list('pub_date', flat=True).first()
+
+    @cached_property
+    def newer(self):
+        if self.boundary is None:
+            return self.hot
+        return self.hot.filter(pub_date__gt=self.boundary)
+
+    @cached_property
+    def older(self):
+        if self.boundary is None:
+            return self.hot.none()
+        return self.hot.filter(pub_date__lte=self.boundary)
+
+    @cached_property
+    def hot_count(self) -> int:
+        return self.newer.count()
+
+    @cached_property
+    def older_count(self) -> int:
+        return self.older.count() if self.boundary is not None else 0
+
+    def count(self) -> int:
+        return self.hot_count + self.older_count + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def _tail(self, start, stop) -> list:
+        if not self.older_count:
+            return list(self.archived[start:stop])
+        merged = heapq.merge(
+            self.older[:stop], self.archived[:stop],
+            key=lambda post: (post.pub_date, post.pk), reverse=True,
+        )
+        return list(itertools.islice(merged, start, stop))
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        hot_count = self.hot_count
+        objects = list(self.newer[start:min(stop, hot_count)]) if (
+            start < hot_count
+        ) else []
+        if stop > hot_count:
+            objects += self._tail(max(start - hot_count, 0), stop - hot_count)
+        return objects
+
+
+def archive_batch(pks) -> int:
+    """Переносит посты с комментариями в архив, возвращает число постов.
+
+    Горячие строки удаляются без сигналов: картинки по-прежнему нужны
+    архивным постам, а статистика групп учитывает архив. Кэши
+    сбрасываются явно.
+    """
+    with transaction.atomic():
+        posts = [
+            ArchivedPost(**row)
+            for row in Post.objects.filter(pk__in=pks).values(*POST_FIELDS)
+        ]
+        ArchivedPost.objects.bulk_create(posts)
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row)
+            for row in Comment.objects.filter(post_id__in=pks)
+            .values(*COMMENT_FIELDS)
+        )
+        TrendingPost.objects.filter(post_id__in=pks).delete()
+        Comment.objects.filter(post_id__in=pks)._raw_delete(
+            Comment.objects.db
+        )
+        Post.objects.filter(pk__in=pks)._raw_delete(Post.objects.db)
+    for pk in pks:
+        object_cache.bump_version(Post, pk)
+    return len(posts)
+
+
+def archive_posts(older_than, batch_size: int,
+                  progress=lambda done: None) -> int:
+    """Архивирует посты, опубликованные раньше older_than."""
+    done = 0
+    queryset = Post.objects.filter(pub_date__lt=older_than)
+    for pks in pk_batches(queryset, batch_size):
+        done += archive_batch(pks)
+        progress(done)
+    return done
@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from ..models import Follow
+
+FOLLOWING_IDS_KEY = 'follow_graph:following_ids:{user_id}'
+FOLLOWER_COUNT_KEY = 'follow_graph:follower_count:{user_id}'
+FOLLOWING_COUNT_KEY = 'follow_graph:following_count:{user_id}'
+FOLLOW_GRAPH_TIMEOUT: int = 60 * 60
+
+
+def get_following_ids(user) -> frozenset:
+    """Возвращает множество id авторов, на которых подписан пользователь.
+
+    Результат кэшируется для каждого пользователя, поэтому лента с кнопками
+    подписки на каждой карточке обходится одним запросом (или ни одним).
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    key = FOLLOWING_IDS_KEY.format(user_id=user.pk)
+    following_ids = cache.get(key)
+    if following_ids is None:
+        following_ids = frozenset(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+        )
+        cache.set(key, following_ids, FOLLOW_GRAPH_TIMEOUT)
+    return following_ids
+
+
+def get_follower_count(user) -> int:
+    """Возвращает закэшированное число подписчиков пользователя."""
+    key = FOLLOWER_COUNT_KEY.format(user_id=user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Follow.objects.filter(author=user).count()
+        cache.set(key, count, FOLLOW_GRAPH_TIMEOUT)
+    return count
+
+
+def get_following_count(user) -> int:
+    """Возвращает закэшированное число подписок пользователя."""
+    key = FOLLOWING_COUNT_KEY.format(user_id=user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Follow.objects.filter(user=user).count()
+        cache.set(key, count, FOLLOW_GRAPH_TIMEOUT)
+    return count
+
+
+def invalidate_following_ids(user, author_ids=()) -> None:
+    """Сбрасывает кэш подписок пользователя после их изменения.
+
+    Вместе с подписками сбрасываются счётчики подписчиков авторов
+    из `author_ids`.
+    """
+    _invalidate(user.pk, author_ids)
+
+
+def invalidate_follow(follow) -> None:
+    """Сбрасывает кэши подписчика и автора подписки `follow`.
+
+    Вызывается сигналами Follow, поэтому работает только с id и
+    не загружает пользователей, которые могут удаляться каскадом.
+    """
+    _invalidate(follow.user_id, [follow.author_id])
+
+
+def _invalidate(user_id, author_ids) -> None:
+    keys = [
+        FOLLOWING_IDS_KEY.format(user_id=user_id),
+        FOLLOWING_COUNT_KEY.format(user_id=user_id),
+    ]
+    keys.extend(
+        FOLLOWER_COUNT_KEY.format(user_id=author_id)
+        for author_id in author_ids
+    )
+    cache.delete_many(keys)
+
+
+def follow(user, author) -> bool:
+    """Подписывает пользователя на автора.
+
+    Повторная подписка и подписка на самого себя ничего не меняют.
+    Возвращает True, если подписка была создана.
+    """
+    if user.pk == author.pk:
+        return False
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    return created
+
+
+def unfollow(user, author) -> bool:
+    """Отписывает пользователя от автора.
+
+    Возвращает True, если подписка существовала.
+    """
+    deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    return bool(deleted)
+
+
+def bulk_follow(user, author_ids) -> int:
+    """Подписывает пользователя на всех авторов из `author_ids`.
+
+    Все подписки создаются одной транзакцией; уже существующие
+    пропускаются. Возвращает число новых подписок.
+    """
+    author_ids = set(author_ids) - {user.pk}
+    with transaction.atomic():
+        new_ids = author_ids - set(
+            Follow.objects.filter(
+                user=user, author_id__in=author_ids
+            ).values_list('author_id', flat=True)
+        )
+        Follow.objects.bulk_create(
+            [Follow(user=user, author_id=pk) for pk in new_ids],
+            ignore_conflicts=True,
+        )
+    if new_ids:
+        invalidate_following_ids(user, new_ids)
+    return len(new_ids)
+
+
+def bulk_unfollow(user, author_ids) -> int:
+    """Отписывает пользователя от всех авторов из `author_ids`.
+
+    Возвращает число удалённых подписок.
+    """
+    author_ids = set(author_ids)
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            user=user, author_id__in=author_ids
+        ).delete()
+    if deleted:
+        invalidate_following_ids(user, author_ids)
+    return deleted
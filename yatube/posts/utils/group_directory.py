@@ -0,0 +1,56 @@
+import hashlib
+
+from django.core.cache import cache
+
+from ..models import Group, GroupStats
+from .paginator import get_cursor_page
+
+VERSION_KEY = 'group_directory:version'
+PAGE_KEY = 'group_directory:{version}:{cursor}'
+PAGE_TIMEOUT: int = 60 * 15
+
+
+def _get_version() -> int:
+    cache.add(VERSION_KEY, 1, None)
+    return cache.get(VERSION_KEY, 1)
+
+
+def invalidate_group_directory() -> None:
+    """Делает устаревшими все закэшированные страницы списка групп."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+def _attach_post_counts(groups) -> None:
+    counts = dict(
+        GroupStats.objects.filter(
+            group_id__in=[group.pk for group in groups]
+        ).values_list('group_id', 'post_count')
+    )
+    for group in groups:
+        group.posts_count = counts.get(group.pk, 0)
+
+
+def get_groups_page(request, per_page: int):
+    """Возвращает страницу списка групп с числом постов в каждой.
+
+    В кэше под версией, которую сбрасывают сигналы изменения групп,
+    лежит только сама страница групп. Число постов каждый раз берётся
+    из GroupStats одним запросом по pk: так оно совпадает со страницей
+    группы (учитывает архив) и новые посты не сбрасывают кэш.
+    """
+    cursor = request.GET.get('cursor', '')
+    key = PAGE_KEY.format(
+        version=_get_version(),
+        cursor=hashlib.md5(cursor.encode()).hexdigest(),
+    )
+    page_obj = cache.get(key)
+    if page_obj is None:
+        page_obj = get_cursor_page(
+            request, Group.objects.all(), per_page, ordering=('title', 'pk')
+        )
+        cache.set(key, page_obj, PAGE_TIMEOUT)
+    _attach_post_counts(page_obj)
+    return page_obj
@@ -0,0 +1,190 @@
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from ..models import (ArchivedComment, ArchivedPost, Comment, Group,
+                      GroupAuthorStats, GroupStats, Post)
+
+TOP_AUTHORS_SIZE: int = 5
+
+
+def _top_authors(group_id) -> str:
+    """Самые активные авторы по счётчикам GroupAuthorStats.
+
+    Запрос идёт по индексу (group, -post_count) и не зависит от
+    числа постов в группе.
+    """
+    usernames = (
+        GroupAuthorStats.objects.filter(group_id=group_id, post_count__gt=0)
+        .order_by('-post_count', 'author__username')
+        .values_list('author__username', flat=True)[:TOP_AUTHORS_SIZE]
+    )
+    return ','.join(usernames)
+
+
+def _refresh_author_stats(group_id) -> None:
+    counts = {}
+    for model in (Post, ArchivedPost):
+        rows = (
+            model.objects.visible().filter(group_id=group_id)
+            .values_list('author_id')
+            .annotate(post_count=Count('id'))
+        )
+        for author_id, post_count in rows:
+            counts[author_id] = counts.get(author_id, 0) + post_count
+    GroupAuthorStats.objects.filter(group_id=group_id).delete()
+    GroupAuthorStats.objects.bulk_create(
+        GroupAuthorStats(
+            group_id=group_id, author_id=author_id, post_count=post_count
+        )
+        for author_id, post_count in counts.items()
+    )
+
+
+def _count_posts(post_model, comment_model, group_id) -> dict:
+    stats = post_model.objects.visible().filter(group_id=group_id).aggregate(
+        post_count=Count('id'), last_post_at=Max('pub_date')
+    )
+    stats['comment_count'] = comment_model.objects.visible().filter(
+        post__group_id=group_id, post__is_hidden=False
+    ).count()
+    return stats
+
+
+def refresh_group_stats(group_id) -> None:
+    """Полностью пересчитывает статистику одной группы.
+
+    Счётчики, в том числе по авторам, учитывают и архивные посты.
+    """
+    if group_id is None:
+        return
+    _refresh_author_stats(group_id)
+    hot = _count_posts(Post, Comment, group_id)
+    archived = _count_posts(ArchivedPost, ArchivedComment, group_id)
+    GroupStats.objects.update_or_create(
+        group_id=group_id,
+        defaults={
+            'post_count': hot['post_count'] + archived['post_count'],
+            'comment_count': (
+                hot['comment_count'] + archived['comment_count']
+            ),
+            'last_post_at': (
+                hot['last_post_at'] or archived['last_post_at']
+            ),
+            'top_authors': _top_authors(group_id),
+        },
+    )
+
+
+def rebuild_group_stats() -> int:
+    """Пересчитывает статистику всех групп и возвращает их число."""
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    for group_id in group_ids:
+        refresh_group_stats(group_id)
+    return len(group_ids)
+
+
+def _last_post_at(group_id):
+    """Дата самого свежего видимого поста группы, запрос по индексу."""
+    for model in (Post, ArchivedPost):
+        latest = (
+            model.objects.visible().filter(group_id=group_id)
+            .order_by('-pub_date').values_list('pub_date', flat=True)
+            .first()
+        )
+        if latest is not None:
+            return latest
+    return None
+
+
+def _shift_author(group_id, author_id, delta: int) -> None:
+    author_stats = GroupAuthorStats.objects.filter(
+        group_id=group_id, author_id=author_id
+    )
+    if delta < 0:
+        author_stats.update(post_count=Greatest(F('post_count') - 1, 0))
+        return
+    if not author_stats.update(post_count=F('post_count') + 1):
+        _, created = GroupAuthorStats.objects.get_or_create(
+            group_id=group_id,
+            author_id=author_id,
+            defaults={'post_count': 1},
+        )
+        if not created:
+            author_stats.update(post_count=F('post_count') + 1)
+
+
+def _shift_post(post, group_id, delta: int, comment_count: int = 0) -> None:
+    """Добавляет (delta=1) или убирает (delta=-1) пост из статистики.
+
+    Число запросов не зависит от размера группы: счётчики сдвигаются
+    через F(), top_authors читается из GroupAuthorStats, а дата
+    последнего поста пересчитывается, только если убран самый свежий.
+    """
+    if group_id is None or post.is_hidden:
+        return
+    _shift_author(group_id, post.author_id, delta)
+    stats = GroupStats.objects.filter(group_id=group_id)
+    counters = {
+        'post_count': Greatest(F('post_count') + delta, 0),
+        'comment_count': Greatest(
+            F('comment_count') + delta * comment_count, 0
+        ),
+        'top_authors': _top_authors(group_id),
+    }
+    if delta > 0:
+        updated = stats.update(
+            last_post_at=Greatest(
+                Coalesce(F('last_post_at'), Value(post.pub_date)),
+                Value(post.pub_date),
+            ),
+            **counters,
+        )
+    else:
+        updated = stats.filter(last_post_at__gt=post.pub_date).update(
+            **counters
+        ) or stats.update(last_post_at=_last_post_at(group_id), **counters)
+    if not updated:
+        refresh_group_stats(group_id)
+
+
+def post_added(post) -> None:
+    """Учитывает новый пост в статистике его группы."""
+    _shift_post(post, post.group_id, 1)
+
+
+def post_removed(post) -> None:
+    """Убирает удалённый пост из статистики его группы.
+
+    Комментарии поста к этому моменту уже вычтены сигналами их
+    каскадного удаления.
+    """
+    _shift_post(post, post.group_id, -1)
+
+
+def post_moved(post, previous_group_id) -> None:
+    """Переносит пост вместе с его комментариями в другую группу."""
+    if post.is_hidden:
+        return
+    comment_count = Comment.objects.visible().filter(post=post).count()
+    _shift_post(post, previous_group_id, -1, comment_count)
+    _shift_post(post, post.group_id, 1, comment_count)
+
+
+def comment_count_changed(group_id, delta: int) -> None:
+    """Сдвигает счётчик комментариев группы на delta."""
+    if group_id is None:
+        return
+    updated = GroupStats.objects.filter(group_id=group_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0)
+    )
+    if not updated:
+        refresh_group_stats(group_id)
+
+
+def get_group_stats(group) -> GroupStats:
+    """Возвращает статистику группы, создавая её при первом обращении."""
+    try:
+        return group.stats
+    except GroupStats.DoesNotExist:
+        refresh_group_stats(group.pk)
+        return GroupStats.objects.get(group_id=group.pk)
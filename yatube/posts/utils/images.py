@@ -0,0 +1,189 @@
+import base64
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+
+from ..models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SIZE: int = 16
+PLACEHOLDER_QUALITY: int = 40
+# Та же миниатюра, что строит шаблон posts/includes/post_image.html.
+THUMBNAIL_GEOMETRY = '960x339'
+
+
+def _needs_processing(image) -> bool:
+    return (
+        max(image.size) > settings.IMAGE_MAX_DIMENSION
+        or bool(image.info.get('exif'))
+        or bool(image.getexif())
+    )
+
+
+def make_placeholder(image) -> str:
+    """Возвращает data: URI размытой копии картинки размером в 16 пикселей.
+
+    Строка занимает несколько сотен байт и встраивается прямо в HTML,
+    пока браузер не загрузил настоящую миниатюру.
+    """
+    from PIL import ImageFilter
+
+    small = image.convert('RGB')
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    small = small.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    small.save(buffer, format='JPEG', quality=PLACEHOLDER_QUALITY)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/jpeg;base64,{encoded}'
+
+
+def make_thumbnail_url(image) -> str:
+    """Строит миниатюру картинки для ленты и возвращает её адрес."""
+    from sorl.thumbnail import get_thumbnail
+
+    return get_thumbnail(
+        image, THUMBNAIL_GEOMETRY, crop='center', upscale=True
+    ).url
+
+
+def process_post_image(post_id, model=Post) -> bool:
+    """Удаляет EXIF, уменьшает слишком большую картинку и строит заглушку.
+
+    Выполняется в фоне после сохранения поста, а для архивных постов -
+    из backfill_images. Ориентация из EXIF применяется к пикселям до
+    удаления метаданных. Адрес миниатюры запоминается в посте, чтобы API
+    не обращался к sorl. Возвращает True, если файл был перезаписан.
+    """
+    from PIL import Image, ImageOps
+
+    post = model.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return False
+    storage = post.image.storage
+    old_name = post.image.name
+    with storage.open(old_name) as source, Image.open(source) as image:
+        rewrite = _needs_processing(image)
+        if (
+            not rewrite and post.image_placeholder and post.image_thumbnail
+        ):
+            return False
+        image_format = image.format
+        processed = ImageOps.exif_transpose(image)
+        placeholder = make_placeholder(processed)
+        if rewrite:
+            processed.thumbnail(
+                (settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION)
+            )
+            if image_format == 'JPEG' and processed.mode not in ('RGB', 'L'):
+                processed = processed.convert('RGB')
+            buffer = io.BytesIO()
+            processed.save(buffer, format=image_format)
+    post.image_placeholder = placeholder
+    update_fields = ['image_placeholder', 'image_thumbnail']
+    if rewrite:
+        # old_name уже лежит в каталоге хэша: сохраняем от upload_to,
+        # иначе каталоги вкладывались бы друг в друга.
+        post.image.name = storage.save(
+            post.image.field.generate_filename(
+                post, posixpath.basename(old_name)
+            ),
+            ContentFile(buffer.getvalue()),
+        )
+        update_fields.append('image')
+    post.image_thumbnail = make_thumbnail_url(post.image)
+    post._image_processed = True
+    post.save(update_fields=update_fields)
+    if rewrite:
+        release_image(old_name)
+    return rewrite
+
+
+def backfill_images(progress=lambda done: None) -> int:
+    """Обрабатывает картинки постов без заглушки или миниатюры.
+
+    Догоняет посты, загруженные до появления фоновой обработки,
+    включая архивные. Битые и пропавшие файлы пропускаются с записью
+    в лог. Возвращает число обработанных постов.
+    """
+    done = 0
+    for model in (Post, ArchivedPost):
+        pks = list(
+            model.objects.exclude(image='')
+            .filter(Q(image_placeholder='') | Q(image_thumbnail=''))
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        for pk in pks:
+            try:
+                process_post_image(pk, model)
+            except OSError:
+                logger.warning(
+                    'Не удалось обработать картинку %s #%s',
+                    model._meta.label, pk, exc_info=True,
+                )
+                continue
+            done += 1
+            progress(done)
+    return done
+
+
+def _image_in_use(name) -> bool:
+    return any(
+        model.objects.filter(image=name).exists()
+        for model in (Post, ArchivedPost)
+    )
+
+
+def release_image(name) -> bool:
+    """Удаляет файл картинки и её миниатюры, если на него не ссылаются.
+
+    Хранилище дедуплицирует одинаковые файлы, поэтому число постов
+    (включая архивные) с этим именем файла служит счётчиком ссылок.
+    Файлы моложе IMAGE_RELEASE_MIN_AGE не трогаются: их может ждать
+    незавершённая загрузка; такие файлы удаляет sweep_images.
+    Возвращает True, если файл был удалён.
+    """
+    from sorl.thumbnail import delete
+
+    if not name:
+        return False
+    storage = Post._meta.get_field('image').storage
+    if not storage.delete_unused(
+        name, lambda: _image_in_use(name), settings.IMAGE_RELEASE_MIN_AGE
+    ):
+        return False
+    delete(name, delete_file=False)
+    return True
+
+
+def _walk(storage, path):
+    directories, files = storage.listdir(path)
+    for file_name in files:
+        if not file_name.endswith('.deleting'):
+            yield posixpath.join(path, file_name)
+    for directory in directories:
+        yield from _walk(storage, posixpath.join(path, directory))
+
+
+def sweep_images(progress=lambda done: None) -> int:
+    """Удаляет картинки постов, на которые никто не ссылается.
+
+    Подбирает файлы, которые release_image пропустил из-за возраста,
+    и файлы постов, удалённых в обход сигналов. Возвращает число
+    удалённых файлов.
+    """
+    field = Post._meta.get_field('image')
+    storage = field.storage
+    if not storage.exists(field.upload_to):
+        return 0
+    deleted = 0
+    for name in _walk(storage, field.upload_to.rstrip('/')):
+        if release_image(name):
+            deleted += 1
+            progress(deleted)
+    return deleted
@@ -0,0 +1,141 @@
+"""Массовая модерация постов и комментариев в фоне.
+
+Задача обходит queryset пачками первичных ключей (pk > последнего
+обработанного, по возрастанию), поэтому не держит в памяти весь
+queryset и не блокирует таблицу одной долгой транзакцией: каждая
+пачка обрабатывается в своей короткой транзакции. Прогресс пишется
+в ModerationJob после каждой пачки.
+
+Задачи выполняются пулом core.background внутри процесса; если
+процесс остановится, задача останется в статусе "Выполняется" и её
+нужно запустить из админки заново.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import object_cache
+from core.background import run_in_background
+
+from ..models import Comment, ModerationJob, Post
+from . import group_stats
+from .images import release_image
+
+logger = logging.getLogger(__name__)
+
+MODELS = {model._meta.label_lower: model for model in (Post, Comment)}
+
+_batch = threading.local()
+
+
+def in_batch_delete() -> bool:
+    """Идёт пакетное удаление: статистику и картинки обновит задача."""
+    return getattr(_batch, 'deleting', False)
+
+
+@contextmanager
+def _batch_delete():
+    _batch.deleting = True
+    try:
+        yield
+    finally:
+        _batch.deleting = False
+
+
+def pk_batches(queryset, size: int):
+    """Отдаёт списки pk из queryset, не больше size в каждом."""
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(
+            pk__gt=last_pk
+        )
+        pks = list(batch[:size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def _affected_groups(model, pks) -> set:
+    """Затронутые группы (до изменения)."""
+    lookup = 'group_id' if model is Post else 'post__group_id'
+    return set(
+        model.objects.filter(pk__in=pks, **{f'{lookup}__isnull': False})
+        .values_list(lookup, flat=True)
+    )
+
+
+def _delete_batch(model, pks) -> None:
+    objects = model.objects.filter(pk__in=pks)
+    images = set(
+        objects.exclude(image='').values_list('image', flat=True)
+    ) if model is Post else set()
+    # Сигналы удаления пропускают пересчёт статистики и освобождение
+    # картинок: группы пересчитает run_job, а каждая картинка
+    # освобождается один раз после коммита пачки.
+    with transaction.atomic(), _batch_delete():
+        objects.delete()
+    for name in images:
+        release_image(name)
+
+
+def _process_batch(job, model, pks) -> set:
+    """Применяет действие к пачке, возвращает затронутые группы."""
+    group_ids = _affected_groups(model, pks)
+    if job.action == ModerationJob.DELETE:
+        _delete_batch(model, pks)
+        return group_ids
+    with transaction.atomic():
+        objects = model.objects.filter(pk__in=pks)
+        if job.action == ModerationJob.MOVE:
+            objects.update(group=job.group)
+            group_ids.add(job.group_id)
+        else:
+            objects.update(is_hidden=job.action == ModerationJob.HIDE)
+    if model is Post:
+        for pk in pks:
+            object_cache.bump_version(Post, pk)
+    return group_ids
+
+
+def run_job(job_id, queryset) -> None:
+    job = ModerationJob.objects.get(pk=job_id)
+    model = MODELS[job.model]
+    job.status = ModerationJob.RUNNING
+    job.total = queryset.count()
+    job.save(update_fields=['status', 'total'])
+    group_ids = set()
+    try:
+        for pks in pk_batches(queryset, settings.MODERATION_BATCH_SIZE):
+            group_ids |= _process_batch(job, model, pks)
+            ModerationJob.objects.filter(pk=job.pk).update(
+                processed=F('processed') + len(pks)
+            )
+    except Exception as error:
+        logger.exception('Moderation job %s failed', job.pk)
+        job.status, job.error = ModerationJob.FAILED, str(error)
+    else:
+        job.status = ModerationJob.DONE
+    finally:
+        for group_id in group_ids:
+            group_stats.refresh_group_stats(group_id)
+        job.finished = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished'])
+
+
+def start_job(queryset, action, user=None, group=None) -> ModerationJob:
+    """Создаёт задачу и запускает её в фоне после коммита."""
+    job = ModerationJob.objects.create(
+        model=queryset.model._meta.label_lower,
+        action=action,
+        group=group,
+        created_by=user,
+    )
+    run_in_background(run_job, job.pk, queryset.all())
+    return job
@@ -1,7 +1,146 @@
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
 
 
 def get_page_obj(request, post_list, posts_displayed: int):
     paginator = Paginator(post_list, posts_displayed)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+class CursorPage:
+    """Страница курсорной (keyset) пагинации.
+
+    В отличие от Page не считает общее число объектов и не использует
+    OFFSET, поэтому стоимость любой страницы одинакова.
+    """
+
+    def __init__(self, object_list, next_cursor=None, is_first=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or not self.is_first
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Не обрезает микросекунды: курсор должен точно совпадать с ключом."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values) -> str:
+    data = json.dumps(values, cls=CursorEncoder).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor):
+    """Возвращает значения из курсора или None, если курсор некорректен."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _keyset_filter(ordering, values):
+    """Условие "строго после values" для сортировки ordering."""
+    conditions = []
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {
+            previous.lstrip('-'): value
+            for previous, value in zip(ordering[:index], values)
+        }
+        conditions.append(
+            Q(**equal, **{f'{name}__{lookup}': values[index]})
+        )
+    return reduce(lambda left, right: left | right, conditions)
+
+
+def _ordering_field(model, name):
+    *path, last = name.split('__')
+    for part in path:
+        model = model._meta.get_field(part).remote_field.model
+    return model._meta.pk if last == 'pk' else model._meta.get_field(last)
+
+
+def clean_cursor(model, ordering, values):
+    """Приводит значения курсора к типам полей сортировки.
+
+    Курсор приходит от клиента, поэтому может быть подделан или
+    устареть; в этом случае возвращается None (первая страница).
+    """
+    if values is None or len(values) != len(ordering):
+        return None
+    cleaned = []
+    for name, value in zip(ordering, values):
+        if value is None:
+            return None
+        try:
+            value = _ordering_field(model, name.lstrip('-')).to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            return None
+        if isinstance(value, datetime.datetime) and (
+            settings.USE_TZ and timezone.is_naive(value)
+        ):
+            return None
+        cleaned.append(value)
+    return cleaned
+
+
+def get_cursor_page(request, queryset, per_page: int, ordering):
+    """Возвращает CursorPage для queryset, отсортированного по ordering.
+
+    Последнее поле ordering должно быть уникальным (обычно 'pk'),
+    иначе объекты с одинаковым ключом могут пропасть между страницами.
+    Некорректный курсор означает первую страницу.
+    """
+    ordering = tuple(ordering)
+    values = clean_cursor(
+        queryset.model, ordering, decode_cursor(request.GET.get('cursor'))
+    )
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(_keyset_filter(ordering, values))
+    objects = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(objects) > per_page:
+        objects = objects[:per_page]
+        last = objects[-1]
+        next_cursor = encode_cursor([
+            getattr(last, field.lstrip('-')) for field in ordering
+        ])
+    return CursorPage(objects, next_cursor, is_first=values is None)
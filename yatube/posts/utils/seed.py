@@ -0,0 +1,266 @@
+"""Генерация большого правдоподобного набора данных для разработки.
+
+Распределения скошены, как на живом сайте: немногие авторы пишут
+большую часть постов и собирают большую часть подписчиков, немногие
+группы и свежие посты получают большую часть активности. Для этого
+индекс в ранжированном списке выбирается как int(n * random() ** k):
+чем больше k, тем сильнее перекос к началу списка.
+
+Каждая пачка строк генерируется своим random.Random с зерном
+`<seed>:<вид>:<номер пачки>`, поэтому результат не зависит от числа
+процессов и порядка их выполнения.
+"""
+import datetime
+import multiprocessing
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from django.utils import timezone
+from faker import Faker
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SEED_PASSWORD = 'seed-password'
+TEXT_POOL_SIZE: int = 2000
+AUTHOR_SKEW: float = 3
+GROUP_SKEW: float = 2
+POST_SKEW: float = 4
+FOLLOW_SKEW: float = 3
+NO_GROUP_SHARE: float = 0.3
+HISTORY_DAYS: int = 365
+MAX_FOLLOWS_PER_USER: int = 200
+
+# Данные, общие для всех пачек; в процессах-воркерах приходят
+# через initializer пула.
+_context: dict = {}
+
+
+def skewed_index(rng, n: int, skew: float) -> int:
+    return int(n * rng.random() ** skew)
+
+
+@contextmanager
+def explicit_dates():
+    """Позволяет задать pub_date и created самим.
+
+    Иначе auto_now_add в bulk_create заменит их на текущее время.
+    """
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _text_pool(seed, nb_sentences):
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    return [
+        fake.paragraph(nb_sentences=nb_sentences)
+        for _ in range(TEXT_POOL_SIZE)
+    ]
+
+
+def _post_date(position: float):
+    """Дата поста по его месту в истории (0 - самый старый)."""
+    start = _context['now'] - datetime.timedelta(days=HISTORY_DAYS)
+    return start + datetime.timedelta(days=HISTORY_DAYS * position)
+
+
+def _post_batch(args):
+    index, start, size = args
+    rng = random.Random(f"{_context['seed']}:post:{index}")
+    user_ids, group_ids = _context['user_ids'], _context['group_ids']
+    texts, total = _context['post_texts'], _context['total_posts']
+    Post.objects.bulk_create(
+        Post(
+            author_id=user_ids[
+                skewed_index(rng, len(user_ids), AUTHOR_SKEW)
+            ],
+            group_id=None if not group_ids or rng.random() < NO_GROUP_SHARE
+            else group_ids[skewed_index(rng, len(group_ids), GROUP_SKEW)],
+            text=rng.choice(texts),
+            pub_date=_post_date((start + offset + rng.random()) / total),
+        )
+        for offset in range(size)
+    )
+    return size
+
+
+def _comment_batch(args):
+    index, start, size = args
+    rng = random.Random(f"{_context['seed']}:comment:{index}")
+    user_ids, post_ids = _context['user_ids'], _context['post_ids']
+    texts, now = _context['comment_texts'], _context['now']
+    comments = []
+    for _ in range(size):
+        # post_ids упорядочены по дате, свежие посты обсуждают чаще.
+        position = len(post_ids) - 1 - skewed_index(
+            rng, len(post_ids), POST_SKEW
+        )
+        created = _post_date(position / len(post_ids)) + datetime.timedelta(
+            hours=rng.expovariate(1 / 12)
+        )
+        comments.append(Comment(
+            post_id=post_ids[position],
+            author_id=rng.choice(user_ids),
+            text=rng.choice(texts),
+            created=min(created, now),
+        ))
+    Comment.objects.bulk_create(comments)
+    return size
+
+
+def _follow_batch(args):
+    index, start, size = args
+    rng = random.Random(f"{_context['seed']}:follow:{index}")
+    user_ids = _context['user_ids']
+    limit = min(MAX_FOLLOWS_PER_USER, len(user_ids) - 1)
+    pairs = set()
+    for _ in range(size if limit > 0 else 0):
+        if len(pairs) >= size:
+            break
+        user_id = rng.choice(user_ids)
+        for _ in range(1 + skewed_index(rng, limit, FOLLOW_SKEW)):
+            author_id = user_ids[
+                skewed_index(rng, len(user_ids), FOLLOW_SKEW)
+            ]
+            if author_id != user_id:
+                pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        [
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in list(pairs)[:size]
+        ],
+        ignore_conflicts=True,
+    )
+    return size
+
+
+def _batches(total: int, batch_size: int) -> list:
+    return [
+        (index, start, min(batch_size, total - start))
+        for index, start in enumerate(range(0, total, batch_size))
+    ]
+
+
+def _init_worker(context):
+    _context.clear()
+    _context.update(context)
+
+
+def _run(func, total, batch_size, workers, progress):
+    """Выполняет пачки в текущем процессе или в пуле из `workers`."""
+    done = 0
+    batches = _batches(total, batch_size)
+    if workers <= 1:
+        results = map(func, batches)
+        pool = None
+    else:
+        # Открытое соединение нельзя делить между процессами.
+        connections.close_all()
+        # fork: воркеры наследуют настроенный Django и explicit_dates.
+        pool = multiprocessing.get_context('fork').Pool(
+            workers, initializer=_init_worker, initargs=(dict(_context),)
+        )
+        results = pool.imap_unordered(func, batches)
+    try:
+        for size in results:
+            done += size
+            progress(done, total)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def create_users(count, seed, batch_size) -> None:
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    password = make_password(SEED_PASSWORD)
+    offset = User.objects.count()
+    for start in range(0, count, batch_size):
+        User.objects.bulk_create(
+            User(
+                username=f'{fake.user_name()}_{offset + number}',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=password,
+            )
+            for number in range(start, min(start + batch_size, count))
+        )
+
+
+def create_groups(count, seed) -> None:
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    offset = Group.objects.count()
+    Group.objects.bulk_create(
+        Group(
+            title=fake.catch_phrase()[:200],
+            slug=f'group-{offset + number}',
+            description=fake.paragraph(),
+        )
+        for number in range(count)
+    )
+
+
+def generate(*, users, groups, posts, comments, follows, seed=0,
+             batch_size=5000, workers=1,
+             progress=lambda stage, done, total: None):
+    """Добавляет в базу сгенерированные данные.
+
+    Сигналы при bulk_create не срабатывают, поэтому после генерации
+    статистику групп, популярное и кэши нужно пересчитать отдельно.
+    """
+    _context.clear()
+    _context.update(seed=seed, now=timezone.now())
+    existing_posts = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+    create_users(users, seed, batch_size)
+    progress('users', users, users)
+    create_groups(groups, seed)
+    progress('groups', groups, groups)
+    _context.update(
+        user_ids=list(
+            User.objects.order_by('pk').values_list('pk', flat=True)
+        ),
+        group_ids=list(
+            Group.objects.order_by('pk').values_list('pk', flat=True)
+        ),
+        post_texts=_text_pool(seed, 5),
+        comment_texts=_text_pool(seed + 1, 2),
+        total_posts=posts,
+    )
+    with explicit_dates():
+        _run(
+            _post_batch, posts, batch_size, workers,
+            lambda done, total: progress('posts', done, total),
+        )
+        _context['post_ids'] = list(
+            Post.objects.filter(pk__gt=existing_posts)
+            .order_by('pub_date', 'pk').values_list('pk', flat=True)
+        )
+        if _context['post_ids']:
+            _run(
+                _comment_batch, comments, batch_size, workers,
+                lambda done, total: progress('comments', done, total),
+            )
+    if len(_context['user_ids']) > 1:
+        _run(
+            _follow_batch, follows, batch_size, workers,
+            lambda done, total: progress('follows', done, total),
+        )
+    _context.clear()
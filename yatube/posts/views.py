@@ -1,16 +1,29 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
+
+from core import object_cache
+from core.events import TooManyConnections, event_bus
+from core.ratelimit import ratelimit
 
 from .forms import CommentForm, PostForm
-from .models import Comment, Group, Post, User, Follow
-from .utils.paginator import get_page_obj
+from .models import ArchivedPost, Comment, Group, Post, TrendingPost, User
+from .utils import follow_graph
+from .utils.archive import ArchiveChain
+from .utils.group_directory import get_groups_page
+from .utils.group_stats import get_group_stats
+from .utils.paginator import get_cursor_page, get_page_obj
 
 POSTS_DISPLAYED: int = 10
+GROUPS_DISPLAYED: int = 50
+BULK_FOLLOW_LIMIT: int = 500
 
 
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
+    post_list = Post.objects.visible()
     page_obj = get_page_obj(request, post_list, POSTS_DISPLAYED)
     context = {
         'page_obj': page_obj,
@@ -18,13 +31,38 @@ def index(request):
     return render(request, template, context)
 
 
+def trending(request):
+    template = 'posts/trending.html'
+    trending_list = TrendingPost.objects.select_related(
+        'post__author', 'post__group'
+    ).filter(post__is_hidden=False)
+    page_obj = get_cursor_page(
+        request, trending_list, POSTS_DISPLAYED, ordering=('rank',)
+    )
+    context = {
+        'page_obj': page_obj,
+        'trending': True,
+    }
+    return render(request, template, context)
+
+
+def group_index(request):
+    template = 'posts/group_index.html'
+    page_obj = get_groups_page(request, GROUPS_DISPLAYED)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group)
+    group = object_cache.get_object_or_404(Group, slug=slug)
+    post_list = Post.objects.visible().filter(group=group)
     page_obj = get_page_obj(request, post_list, POSTS_DISPLAYED)
     context = {
         'group': group,
+        'stats': get_group_stats(group),
         'page_obj': page_obj,
     }
     return render(request, template, context)
@@ -32,40 +70,80 @@ def group_posts(request, slug):
 
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author = object_cache.get_object_or_404(User, username=username)
+    post_list = ArchiveChain(
+        author.posts.visible(), author.archived_posts.visible()
+    )
     page_obj = get_page_obj(request, post_list, POSTS_DISPLAYED)
     context = {
         'author': author,
         'page_obj': page_obj,
+        'following': author.pk in follow_graph.get_following_ids(
+            request.user
+        ),
+        'follower_count': follow_graph.get_follower_count(author),
+        'following_count': follow_graph.get_following_count(author),
     }
     return render(request, template, context)
 
 
+def get_visible_post_or_404(post_id) -> Post:
+    post = object_cache.get_object_or_404(Post, pk=post_id)
+    if post.is_hidden:
+        raise Http404('Пост скрыт модератором.')
+    return post
+
+
+def _author_posts_count(author) -> int:
+    return (
+        author.posts.visible().count()
+        + author.archived_posts.visible().count()
+    )
+
+
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
+    try:
+        post = get_visible_post_or_404(post_id)
+    except Http404:
+        return archived_post_detail(request, post_id)
+    object_cache.attach_related(post, 'author', 'group')
     form = CommentForm()
-    comments = Comment.objects.filter(post=post)
+    comments = Comment.objects.visible().filter(post=post)
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        'author_posts_count': _author_posts_count(post.author),
+    }
+    return render(request, template, context)
+
+
+def archived_post_detail(request, post_id):
+    template = 'posts/post_detail.html'
+    post = get_object_or_404(
+        ArchivedPost.objects.visible().select_related('author', 'group'),
+        pk=post_id,
+    )
+    context = {
+        'post': post,
+        'comments': post.comments.visible().select_related('author'),
+        'author_posts_count': _author_posts_count(post.author),
+        'archived': True,
     }
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('post_create')
 def post_create(request):
-    if request.method == 'POST':
-        form = PostForm(request.POST, files=request.FILES or None)
-        if form.is_valid():
-            post = form.save(commit=False)
-            post.author = request.user
-            post.save()
-            return redirect('posts:profile', post.author)
+    form = PostForm(request.POST or None, files=request.FILES or None)
+    if form.is_valid():
+        post = form.save(commit=False)
+        post.author = request.user
+        post.save()
+        return redirect('posts:profile', request.user.username)
     template = 'posts/post_create.html'
-    form = PostForm()
     context = {
         'form': form,
     }
@@ -74,22 +152,20 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    if request.user != post.author:
+    post = object_cache.get_object_or_404(Post, pk=post_id)
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post_id)
 
-    if request.method == 'POST':
-        form = PostForm(
-            request.POST,
-            files=request.FILES or None,
-            instance=post
-        )
-        if form.is_valid():
-            form.save()
-            return redirect('posts:post_detail', post_id)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        instance=post
+    )
+    if form.is_valid():
+        form.save()
+        return redirect('posts:post_detail', post_id)
 
     template = 'posts/post_create.html'
-    form = PostForm(instance=post)
     context = {
         'post': post,
         'form': form,
@@ -99,9 +175,10 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, id=post_id)
+    post = get_visible_post_or_404(post_id)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
@@ -112,12 +189,12 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    try:
-        post_list = Post.objects.filter(
-            author=request.user.follower.get().author
-        )
-    except Follow.DoesNotExist:
+    following_ids = follow_graph.get_following_ids(request.user)
+    if not following_ids:
         return redirect('posts:index')
+    post_list = Post.objects.visible().filter(
+        author_id__in=following_ids
+    )
     template = 'posts/follow.html'
     page_obj = get_page_obj(request, post_list, POSTS_DISPLAYED)
     context = {
@@ -127,17 +204,68 @@ def follow_index(request):
 
 
 @login_required
+@ratelimit('profile_follow', methods=None)
 def profile_follow(request, username):
-    Follow.objects.create(
-        user=request.user,
-        author=User.objects.filter(username=username)
-    )
+    author = get_object_or_404(User, username=username)
+    follow_graph.follow(request.user, author)
     return redirect('posts:follow_index')
 
 
 @login_required
 def profile_unfollow(request, username):
-    Follow.objects.filter(
-        author=User.objects.get(username=username)
-    ).filter(user=request.user).delete()
+    author = get_object_or_404(User, username=username)
+    follow_graph.unfollow(request.user, author)
     return redirect('posts:follow_index')
+
+
+@login_required
+@require_POST
+@ratelimit('profile_follow')
+def profile_follow_bulk(request):
+    usernames = request.POST.getlist('username')[:BULK_FOLLOW_LIMIT]
+    author_ids = User.objects.filter(
+        username__in=usernames
+    ).values_list('pk', flat=True)
+    if request.POST.get('action') == 'unfollow':
+        follow_graph.bulk_unfollow(request.user, author_ids)
+    else:
+        follow_graph.bulk_follow(request.user, author_ids)
+    return redirect('posts:follow_index')
+
+
+def _event_stream_response(channels):
+    # 204 не даёт EventSource переподключаться.
+    if not settings.EVENT_STREAMS_ENABLED or not channels:
+        return HttpResponse(status=204)
+    try:
+        stream = event_bus.subscribe(channels)
+    except TooManyConnections:
+        response = HttpResponse(status=503)
+        response['Retry-After'] = 30
+        return response
+    response = StreamingHttpResponse(
+        stream, content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def post_stream(request):
+    feed = request.GET.get('feed', 'index')
+    if feed == 'follow':
+        channels = [
+            f'posts:author:{author_id}'
+            for author_id in follow_graph.get_following_ids(request.user)
+        ]
+    elif feed.startswith('group:'):
+        group = object_cache.get_object_or_404(Group, slug=feed[6:])
+        channels = [f'posts:group:{group.pk}']
+    else:
+        channels = ['posts:index']
+    return _event_stream_response(channels)
+
+
+def comment_stream(request, post_id):
+    post = get_visible_post_or_404(post_id)
+    return _event_stream_response([f'comments:post:{post.pk}'])
@@ -1,10 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 
+from core.forms import StyledFormMixin
+
 User = get_user_model()
 
 
-class CreationForm(UserCreationForm):
+class CreationForm(StyledFormMixin, UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
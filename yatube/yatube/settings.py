@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -47,11 +49,12 @@ TEMPLATES = [
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
-                'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.following.following',
+                'core.context_processors.live_updates.live_updates',
             ],
         },
     },
@@ -109,6 +112,15 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Outside DEBUG, collectstatic writes hashed names plus .gz/.br copies,
+# which core.static_server serves from yatube.wsgi with far-future caching.
+
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    )
 
 # Login and logout paths:
 
@@ -125,8 +137,109 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media files are stored under their content hash and deduplicated;
+# sorl names thumbnails itself, so they use the plain storage.
+
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
+# Uploads are always streamed to a temporary file; anything above
+# FILE_UPLOAD_MAX_SIZE is discarded while reading and rejected by the form.
+
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.LimitedTemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_MAX_DIMENSION = 2048
+# Unreferenced images younger than this may belong to an upload whose
+# post is not committed yet; `manage.py sweep_images` removes them later.
+IMAGE_RELEASE_MIN_AGE = 60 * 60
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Trending feed (posts/utils/trending.py):
+
+TRENDING_WINDOW_HOURS = 48
+TRENDING_HALF_LIFE_HOURS = 6
+TRENDING_FOLLOWER_WEIGHT = 0.5
+TRENDING_SIZE = 500
+
+# Server-sent events (core/events.py). An open stream holds a worker
+# thread of the WSGI server, so live updates are opt-in and streams may
+# take at most half of the threads of one worker process:
+
+EVENT_STREAMS_ENABLED = False
+WSGI_THREADS = 8
+EVENT_STREAM_MAX_CONNECTIONS = WSGI_THREADS // 2
+EVENT_STREAM_HEARTBEAT = 15
+EVENT_STREAM_MAX_AGE = 60
+
+# Rate limiting (core/ratelimit.py), rates are "<requests>/<s|m|h|d>":
+
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'post_create': {'user': '20/m', 'ip': '60/m'},
+    'add_comment': {'user': '30/m', 'ip': '90/m'},
+    'profile_follow': {'user': '60/m', 'ip': '180/m'},
+    'signup': {'ip': '10/h'},
+}
+# Behind N reverse proxies the client address is the N-th from the end
+# of RATELIMIT_IP_HEADER; 0 means REMOTE_ADDR is the client.
+RATELIMIT_TRUSTED_PROXIES = 0
+RATELIMIT_IP_HEADER = 'HTTP_X_FORWARDED_FOR'
+# Paths answered with JSON instead of the HTML 429 page.
+RATELIMIT_JSON_PATHS = ('/api/',)
+
+# Background tasks (core/background.py):
+
+BACKGROUND_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+# Response compression (core/middleware.py):
+
+COMPRESSION_MIN_LENGTH = 200
+HTML_MINIFY_ENABLED = True
+
+# Front-end bundles (core/assets.py), built by `manage.py build_assets`
+# before collectstatic; in DEBUG the source files are served one by one:
+
+ASSET_BUNDLES = {
+    'site.css': ['css/bootstrap.min.css', 'css/styles.css'],
+    'site.js': [
+        'js/jquery-3.2.1.slim.min.js',
+        'js/popper.min.js',
+        'js/bootstrap.js',
+    ],
+}
+ASSET_BUNDLE_DIR = os.path.join(BASE_DIR, 'static', 'bundles')
+ASSET_BUNDLES_ENABLED = not DEBUG
+
+# Tests run in parallel (one process per CPU) and report the slowest ones:
+
+TEST_RUNNER = 'core.test_runner.TimedDiscoverRunner'
+
+# Widget templates are compiled once per process, also in DEBUG
+# (core/forms.py):
+
+FORM_RENDERER = 'core.forms.CachedTemplatesRenderer'
+
+# Admin changelists of big tables take the row count from database
+# statistics when it is at least this large (core/admin.py):
+
+ADMIN_ESTIMATED_COUNT_MIN = 10000
+
+# Bulk moderation jobs started from the admin (posts/utils/moderation.py)
+# process this many primary keys per transaction:
+
+MODERATION_BATCH_SIZE = 1000
+
+# Posts older than this are moved to the archive tables by
+# `manage.py archive_posts` (posts/utils/archive.py):
+
+ARCHIVE_POSTS_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 1000
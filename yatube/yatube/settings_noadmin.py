@@ -0,0 +1,12 @@
+"""Settings for web workers that do not serve the admin site.
+
+Without django.contrib.admin the worker does not import the admin
+modules and the ModelAdmin classes of every app at startup. Run the
+admin from a separate process with the regular settings.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS if app != 'django.contrib.admin'
+]
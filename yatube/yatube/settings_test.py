@@ -0,0 +1,25 @@
+"""Settings for running tests: `manage.py test` and pytest pick them up."""
+import atexit
+import shutil
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# Salted MD5 is insecure but ~1000x cheaper than PBKDF2 for create_user.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Uploaded files never reach the real MEDIA_ROOT.
+MEDIA_ROOT = tempfile.mkdtemp(prefix='yatube-test-media-')
+atexit.register(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# sorl-thumbnail returns placeholder URLs instead of resizing images.
+THUMBNAIL_DUMMY = True